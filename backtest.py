@@ -0,0 +1,542 @@
+"""
+Replay a round's Trader over IMC price files, one day at a time.
+
+Price files are the competition's semicolon-separated exports
+(`prices_round_N_day_D.csv`, one row per product per timestamp with up to
+three book levels a side). A day is loaded into dense NumPy arrays indexed
+by (tick, product, level), which the replay and the walk-forward evaluator
+both read from.
+
+Each tick the Trader sees the book, its position and last tick's fills.
+Orders fill immediately against the levels they cross, and whatever is left
+is cancelled at the end of the tick. As on the exchange, all of a product's
+orders are rejected when they could take the position past its limit.
+
+Each day starts flat with a fresh Trader, or with --carry-over the days run
+as one session. Long runs can write compact binary checkpoints (traderData,
+positions, cash, pending fills and the tick cursor) and pick up from the
+latest one with --resume. When carrying over, a checkpoint is also written
+on entering each day, so a shard of days can start at its first day
+without replaying the earlier ones.
+
+Needs the competition's datamodel.py importable, like the rounds themselves.
+
+    python backtest.py round3 data/prices_round_3_day_*.csv
+    python backtest.py round3 data/prices_round_3_day_*.csv --carry-over --checkpoint-dir checkpoints
+    python backtest.py round3 data/prices_round_3_day_*.csv --carry-over --checkpoint-dir checkpoints --resume
+    python backtest.py round3 data/prices_round_3_day_*.csv --carry-over --checkpoint-dir checkpoints --first-day 2
+"""
+import argparse
+import csv
+import importlib
+import math
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+
+ROUND_PRODUCTS = {
+    "round1": ["PEARLS", "BANANAS", "COCONUTS"],
+    "round2": ["PINA_COLADAS", "DIVING_GEAR", "BERRIES"],
+    "round3": ["DOLPHIN_SIGHTINGS", "BAGUETTE", "DIP"],
+    "round4": ["UKULELE", "PICNIC_BASKET", "TREASURE_MAP"],
+    "round5": ["COCONUT_COUPON", "INVENTORY", "SUNDIAL"],
+}
+
+# Mirrors POSITION_LIMIT in each round's Trader.run
+POSITION_LIMITS = {
+    "round1": 20,
+    "round2": 15,
+    "round3": 25,
+    "round4": 30,
+    "round5": 35,
+}
+
+LEVELS = 3
+
+
+class DayTicks:
+    """
+    One day of order books as dense arrays. Prices and volumes are
+    (ticks, products, LEVELS) integers with 0 marking an empty level; ask
+    volumes are stored positive. `mid` is NaN where a side is empty.
+    """
+
+    def __init__(self, day, timestamps, products, bid_prices, bid_volumes, ask_prices, ask_volumes):
+        self.day = day
+        self.timestamps = timestamps
+        self.products = products
+        self.bid_prices = bid_prices
+        self.bid_volumes = bid_volumes
+        self.ask_prices = ask_prices
+        self.ask_volumes = ask_volumes
+
+        best_bid = bid_prices[:, :, 0].astype(np.float64)
+        best_ask = ask_prices[:, :, 0].astype(np.float64)
+        two_sided = (bid_volumes[:, :, 0] > 0) & (ask_volumes[:, :, 0] > 0)
+        self.mid = np.where(two_sided, (best_bid + best_ask) / 2.0, np.nan)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def order_depths(self, tick):
+        """Book of every product at `tick`, as the datamodel's OrderDepth objects."""
+        from datamodel import OrderDepth
+
+        depths = {}
+        for p, product in enumerate(self.products):
+            depth = OrderDepth()
+            for level in range(LEVELS):
+                if self.bid_volumes[tick, p, level] > 0:
+                    depth.buy_orders[int(self.bid_prices[tick, p, level])] = int(self.bid_volumes[tick, p, level])
+                if self.ask_volumes[tick, p, level] > 0:
+                    depth.sell_orders[int(self.ask_prices[tick, p, level])] = -int(self.ask_volumes[tick, p, level])
+            depths[product] = depth
+        return depths
+
+
+def _int(value):
+    return int(float(value)) if value else 0
+
+
+def load_day(path):
+    """Read one price file into a DayTicks."""
+    rows = []
+    with open(path, newline="") as price_file:
+        for row in csv.DictReader(price_file, delimiter=";"):
+            rows.append(row)
+    if not rows:
+        raise ValueError(f"{path} has no rows")
+
+    timestamps = sorted({int(row["timestamp"]) for row in rows})
+    products = sorted({row["product"] for row in rows})
+    tick_index = {timestamp: i for i, timestamp in enumerate(timestamps)}
+    product_index = {product: p for p, product in enumerate(products)}
+
+    shape = (len(timestamps), len(products), LEVELS)
+    bid_prices = np.zeros(shape, dtype=np.int64)
+    bid_volumes = np.zeros(shape, dtype=np.int64)
+    ask_prices = np.zeros(shape, dtype=np.int64)
+    ask_volumes = np.zeros(shape, dtype=np.int64)
+    for row in rows:
+        t = tick_index[int(row["timestamp"])]
+        p = product_index[row["product"]]
+        for level in range(LEVELS):
+            bid_prices[t, p, level] = _int(row.get(f"bid_price_{level + 1}"))
+            bid_volumes[t, p, level] = abs(_int(row.get(f"bid_volume_{level + 1}")))
+            ask_prices[t, p, level] = _int(row.get(f"ask_price_{level + 1}"))
+            ask_volumes[t, p, level] = abs(_int(row.get(f"ask_volume_{level + 1}")))
+
+    return DayTicks(
+        int(rows[0]["day"]), np.array(timestamps, dtype=np.int64), products,
+        bid_prices, bid_volumes, ask_prices, ask_volumes
+    )
+
+
+def synthetic_day(products, n_ticks, seed=0, day=0, listed=None):
+    """
+    Random DayTicks for benchmarks and tests. Each mid alternates between
+    trending and mean-reverting stretches of 500 ticks; spreads and volumes
+    are random. `listed` maps a product to the [first, last) ticks it is
+    quoted in; outside that window its book is empty.
+    """
+    rng = np.random.default_rng(seed)
+    listed = listed or {}
+    shape = (n_ticks, len(products), LEVELS)
+    bid_prices = np.zeros(shape, dtype=np.int64)
+    bid_volumes = np.zeros(shape, dtype=np.int64)
+    ask_prices = np.zeros(shape, dtype=np.int64)
+    ask_volumes = np.zeros(shape, dtype=np.int64)
+
+    offsets = np.arange(LEVELS)
+    for p, product in enumerate(products):
+        shocks = rng.normal(0, 1.5, n_ticks)
+        persistence = np.where((np.arange(n_ticks) // 500) % 2 == 0, 0.3, -0.3)
+        returns = np.zeros(n_ticks)
+        for t in range(1, n_ticks):
+            returns[t] = persistence[t] * returns[t - 1] + shocks[t]
+        mids = 1000.0 * (p + 1) + returns.cumsum()
+
+        first, last = listed.get(product, (0, n_ticks))
+        for t in range(first, min(last, n_ticks)):
+            best_bid = int(math.floor(mids[t])) - int(rng.integers(0, 2))
+            best_ask = best_bid + int(rng.integers(1, 4))
+            bid_prices[t, p] = best_bid - offsets
+            ask_prices[t, p] = best_ask + offsets
+            bid_volumes[t, p] = rng.integers(1, 31, LEVELS)
+            ask_volumes[t, p] = rng.integers(1, 31, LEVELS)
+
+    timestamps = np.arange(n_ticks, dtype=np.int64) * 100
+    return DayTicks(day, timestamps, list(products), bid_prices, bid_volumes, ask_prices, ask_volumes)
+
+
+def day_number(path):
+    """Day encoded in a price file name (`..._day_-1.csv` gives -1), or None."""
+    match = re.search(r"day_(-?\d+)", os.path.basename(path))
+    return int(match.group(1)) if match else None
+
+
+def sort_day_files(paths):
+    """Price files in day order; files without a day in their name keep their given order at the end."""
+    return sorted(paths, key=lambda path: (day_number(path) is None, day_number(path) or 0))
+
+
+def fill_orders(ticks, tick, product_index, orders, position, limit):
+    """
+    Match one product's orders against the book at `tick`.
+    Returns (price, signed quantity) fills; none when the orders could breach `limit`.
+    """
+    total_buy = sum(order.quantity for order in orders if order.quantity > 0)
+    total_sell = sum(-order.quantity for order in orders if order.quantity < 0)
+    if position + total_buy > limit or position - total_sell < -limit:
+        return []
+
+    # Volumes left at each level, so two orders never take the same liquidity
+    ask_left = ticks.ask_volumes[tick, product_index].tolist()
+    bid_left = ticks.bid_volumes[tick, product_index].tolist()
+    fills = []
+    for order in orders:
+        remaining = abs(order.quantity)
+        for level in range(LEVELS):
+            if remaining == 0:
+                break
+            if order.quantity > 0:
+                price = int(ticks.ask_prices[tick, product_index, level])
+                if ask_left[level] == 0 or price > order.price:
+                    continue
+                quantity = min(remaining, ask_left[level])
+                ask_left[level] -= quantity
+                fills.append((price, quantity))
+            else:
+                price = int(ticks.bid_prices[tick, product_index, level])
+                if bid_left[level] == 0 or price < order.price:
+                    continue
+                quantity = min(remaining, bid_left[level])
+                bid_left[level] -= quantity
+                fills.append((price, -quantity))
+            remaining -= quantity
+    return fills
+
+
+class Replay:
+    """
+    One Trader stepped through one or more days. Positions, cash and fills
+    are tracked per product; `pnl` marks open positions to the last known mid.
+    """
+
+    def __init__(self, module_name, ticks):
+        self.module_name = module_name
+        self.ticks = ticks
+        self.limit = POSITION_LIMITS[module_name]
+        self.trader = importlib.import_module(module_name).Trader()
+        self.trader_data = ""
+        self.position = {product: 0 for product in ticks.products}
+        self.cash = {product: 0.0 for product in ticks.products}
+        # Last mid of products from earlier days, for marking positions they left open
+        self.marks = {}
+        self.own_trades = {}
+        self.cursor = 0
+        self.last_run_seconds = 0.0
+
+    def next_day(self, ticks):
+        """Carry the Trader, traderData, positions and cash over into the next day."""
+        self.marks = self.current_marks()
+        self.ticks = ticks
+        self.cursor = 0
+        self.own_trades = {}
+        for product in ticks.products:
+            self.position.setdefault(product, 0)
+            self.cash.setdefault(product, 0.0)
+
+    def step(self):
+        """Run the Trader on the tick at the cursor and apply its fills."""
+        from datamodel import Observation, Trade, TradingState
+
+        ticks = self.ticks
+        tick = self.cursor
+        timestamp = int(ticks.timestamps[tick])
+        state = TradingState(
+            self.trader_data, timestamp, {}, ticks.order_depths(tick),
+            self.own_trades, {}, dict(self.position), Observation({}, {})
+        )
+        start = time.perf_counter()
+        result, _, self.trader_data = self.trader.run(state)
+        self.last_run_seconds = time.perf_counter() - start
+
+        own_trades = {}
+        for product, orders in result.items():
+            if product not in ticks.products:
+                continue
+            p = ticks.products.index(product)
+            trades = []
+            for price, quantity in fill_orders(ticks, tick, p, orders, self.position[product], self.limit):
+                self.position[product] += quantity
+                self.cash[product] -= price * quantity
+                if quantity > 0:
+                    trades.append(Trade(product, price, quantity, "SUBMISSION", "", timestamp))
+                else:
+                    trades.append(Trade(product, price, -quantity, "", "SUBMISSION", timestamp))
+            if trades:
+                own_trades[product] = trades
+        self.own_trades = own_trades
+        self.cursor += 1
+
+    def run(self):
+        while self.cursor < len(self.ticks):
+            self.step()
+        return self.pnl()
+
+    def current_marks(self):
+        """Last mid seen so far for every product, falling back to earlier days."""
+        marks = dict(self.marks)
+        for p, product in enumerate(self.ticks.products):
+            mids = self.ticks.mid[:self.cursor, p]
+            seen = mids[~np.isnan(mids)]
+            if len(seen):
+                marks[product] = float(seen[-1])
+        return marks
+
+    def pnl(self):
+        """Cash plus open position at the last mid seen so far, per product."""
+        marks = self.current_marks()
+        return {product: self.cash[product] + self.position[product] * marks.get(product, 0.0) for product in self.position}
+
+    def snapshot(self, day):
+        """
+        Everything needed to continue this replay in another process, as
+        compact bytes: traderData, positions, cash, marks, the fills the
+        Trader has yet to see and the cursor into `day`. Orders never rest
+        between ticks, so there is no order book of our own to save.
+        """
+        body = [SNAPSHOT_HEADER.pack(day, self.cursor), _pack_text(self.module_name), _pack_text(self.trader_data)]
+        body.append(_COUNT.pack(len(self.position)))
+        for product in sorted(self.position):
+            body.append(_pack_text(product))
+            body.append(_PRODUCT_STATE.pack(self.position[product], self.cash[product], self.marks.get(product, math.nan)))
+        trades = [trade for product in sorted(self.own_trades) for trade in self.own_trades[product]]
+        body.append(_COUNT.pack(len(trades)))
+        for trade in trades:
+            quantity = trade.quantity if trade.buyer == "SUBMISSION" else -trade.quantity
+            body.append(_pack_text(trade.symbol))
+            body.append(_TRADE.pack(trade.price, quantity, trade.timestamp))
+        return SNAPSHOT_MAGIC + _COUNT.pack(SNAPSHOT_VERSION) + zlib.compress(b"".join(body))
+
+    @classmethod
+    def restore(cls, data, ticks):
+        """
+        Rebuild a replay from `snapshot` bytes on the day's `ticks`, with a
+        fresh Trader. Returns (replay, day). The Trader's in-process caches
+        are rebuilt from traderData, so the continuation matches an
+        uninterrupted run.
+        """
+        from datamodel import Trade
+
+        body = _snapshot_body(data)
+        day, cursor = SNAPSHOT_HEADER.unpack_from(body, 0)
+        offset = SNAPSHOT_HEADER.size
+        module_name, offset = _unpack_text(body, offset)
+        trader_data, offset = _unpack_text(body, offset)
+
+        replay = cls(module_name, ticks)
+        replay.trader_data = trader_data
+        replay.cursor = cursor
+        (n_products,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        for _ in range(n_products):
+            product, offset = _unpack_text(body, offset)
+            position, cash, mark = _PRODUCT_STATE.unpack_from(body, offset)
+            offset += _PRODUCT_STATE.size
+            replay.position[product] = position
+            replay.cash[product] = cash
+            if not math.isnan(mark):
+                replay.marks[product] = mark
+        (n_trades,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        for _ in range(n_trades):
+            product, offset = _unpack_text(body, offset)
+            price, quantity, timestamp = _TRADE.unpack_from(body, offset)
+            offset += _TRADE.size
+            if quantity > 0:
+                trade = Trade(product, price, quantity, "SUBMISSION", "", timestamp)
+            else:
+                trade = Trade(product, price, -quantity, "", "SUBMISSION", timestamp)
+            replay.own_trades.setdefault(product, []).append(trade)
+        return replay, day
+
+
+SNAPSHOT_MAGIC = b"PRCK"
+SNAPSHOT_VERSION = 1
+# Day and cursor
+SNAPSHOT_HEADER = struct.Struct("<qq")
+_COUNT = struct.Struct("<I")
+# Position, cash, mark (NaN when unknown)
+_PRODUCT_STATE = struct.Struct("<qdd")
+# Price, signed quantity (+ bought), timestamp
+_TRADE = struct.Struct("<qqq")
+
+# Ticks between periodic checkpoints
+CHECKPOINT_EVERY = 1000
+
+
+def _pack_text(text):
+    encoded = text.encode()
+    return _COUNT.pack(len(encoded)) + encoded
+
+
+def _unpack_text(data, offset):
+    (length,) = _COUNT.unpack_from(data, offset)
+    start = offset + _COUNT.size
+    return data[start:start + length].decode(), start + length
+
+
+def _snapshot_body(data):
+    """Validate snapshot bytes and return the decompressed body."""
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("not a backtest checkpoint")
+    (version,) = _COUNT.unpack_from(data, len(SNAPSHOT_MAGIC))
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"checkpoint version {version}, expected {SNAPSHOT_VERSION}")
+    return zlib.decompress(data[len(SNAPSHOT_MAGIC) + _COUNT.size:])
+
+
+def checkpoint_info(data):
+    """(day, cursor, round module name) recorded in snapshot bytes, without restoring them."""
+    body = _snapshot_body(data)
+    day, cursor = SNAPSHOT_HEADER.unpack_from(body, 0)
+    module_name, _ = _unpack_text(body, SNAPSHOT_HEADER.size)
+    return day, cursor, module_name
+
+
+def write_checkpoint(path, data):
+    """
+    Write snapshot bytes so that a crash mid-write leaves the previous
+    checkpoint intact. The temporary file is unique to this process, so
+    concurrent shards writing the same day boundary cannot interleave.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as checkpoint_file:
+        checkpoint_file.write(data)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path):
+    with open(path, "rb") as checkpoint_file:
+        return checkpoint_file.read()
+
+
+def replay_days(module_name, paths, checkpoint_dir=None, checkpoint_every=CHECKPOINT_EVERY,
+                carry_over=False, resume=False, first_day=None, last_day=None):
+    """
+    Replay price files in day order, yielding (day, ticks, seconds, day pnl)
+    per product as each day finishes.
+
+    Each day starts flat with a fresh Trader unless `carry_over`, which runs
+    the days as one continuous session. `first_day` and `last_day` restrict
+    the run to a shard of days. When carrying over, a shard that starts after
+    the first day file restores the boundary checkpoint of its first actual
+    day (raising FileNotFoundError when there is none) instead of replaying
+    the days before it. With a `checkpoint_dir`, the shard is snapshotted to
+    its own `latest_<first>-<last>.ckpt` (its first and last day) every
+    `checkpoint_every` ticks and at the end of each day, and, when carrying
+    over, to `day_<D>.ckpt` as it enters day D. `resume` continues from the
+    shard's latest checkpoint, and raises ValueError when that checkpoint
+    belongs to another round or falls outside the shard's days.
+    """
+    days = [(day_number(path) if day_number(path) is not None else i, path) for i, path in enumerate(sort_day_files(paths))]
+    shard = [
+        (day, path) for day, path in days
+        if (first_day is None or day >= first_day) and (last_day is None or day <= last_day)
+    ]
+    if not shard:
+        return
+    latest_path = os.path.join(checkpoint_dir, f"latest_{shard[0][0]}-{shard[-1][0]}.ckpt") if checkpoint_dir else None
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    resume_data = None
+    resume_day = None
+    if resume and latest_path and os.path.exists(latest_path):
+        resume_data = read_checkpoint(latest_path)
+        resume_day, _, resume_module = checkpoint_info(resume_data)
+        if resume_module != module_name:
+            raise ValueError(f"{latest_path} is a {resume_module} checkpoint, not {module_name}")
+        if not shard[0][0] <= resume_day <= shard[-1][0]:
+            raise ValueError(f"{latest_path} is at day {resume_day}, outside this shard's days {shard[0][0]}-{shard[-1][0]}")
+
+    replay = None
+    for day, path in shard:
+        if resume_day is not None and day < resume_day:
+            continue
+
+        ticks = load_day(path)
+        boundary_path = os.path.join(checkpoint_dir, f"day_{day}.ckpt") if checkpoint_dir else None
+        if resume_day == day:
+            replay, _ = Replay.restore(resume_data, ticks)
+            resume_day = None
+        elif carry_over and replay is not None:
+            replay.next_day(ticks)
+        elif carry_over and day == shard[0][0] and day != days[0][0]:
+            if not boundary_path or not os.path.exists(boundary_path):
+                raise FileNotFoundError(f"no checkpoint at the start of day {day}; replay the earlier days with a checkpoint directory first")
+            replay, _ = Replay.restore(read_checkpoint(boundary_path), ticks)
+        else:
+            replay = Replay(module_name, ticks)
+
+        # A day's pnl is measured from the state the replay entered it with
+        if replay.cursor == 0:
+            opening = replay.pnl()
+            if carry_over and boundary_path:
+                write_checkpoint(boundary_path, replay.snapshot(day))
+        elif carry_over and boundary_path and os.path.exists(boundary_path):
+            opening = Replay.restore(read_checkpoint(boundary_path), ticks)[0].pnl()
+        else:
+            opening = {}
+
+        start = time.perf_counter()
+        while replay.cursor < len(ticks):
+            replay.step()
+            if latest_path and replay.cursor % checkpoint_every == 0:
+                write_checkpoint(latest_path, replay.snapshot(day))
+        elapsed = time.perf_counter() - start
+        if latest_path:
+            write_checkpoint(latest_path, replay.snapshot(day))
+
+        closing = replay.pnl()
+        yield day, len(ticks), elapsed, {product: value - opening.get(product, 0.0) for product, value in closing.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("round", choices=sorted(ROUND_PRODUCTS))
+    parser.add_argument("price_files", nargs="+")
+    parser.add_argument("--carry-over", action="store_true", help="run the days as one session instead of starting each day flat")
+    parser.add_argument("--checkpoint-dir")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--resume", action="store_true", help="continue from this shard's latest checkpoint")
+    parser.add_argument("--first-day", type=int, help="first day of this shard")
+    parser.add_argument("--last-day", type=int, help="last day of this shard")
+    args = parser.parse_args()
+
+    total = {}
+    for day, n_ticks, elapsed, pnl in replay_days(
+        args.round, args.price_files, args.checkpoint_dir, args.checkpoint_every,
+        args.carry_over, args.resume, args.first_day, args.last_day
+    ):
+        traded = {product: value for product, value in pnl.items() if product in ROUND_PRODUCTS[args.round]}
+        for product, value in traded.items():
+            total[product] = total.get(product, 0.0) + value
+        summary = "  ".join(f"{product} {value:>10.1f}" for product, value in traded.items())
+        print(f"day {day:>3}  {n_ticks:>6} ticks  {elapsed:>7.2f} s  {summary}")
+    print("total  " + "  ".join(f"{product} {value:>10.1f}" for product, value in total.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Append-only binary journal of what each round decided and why.
+
+Every product a round looks at on a tick becomes one fixed-size record: the
+timestamp, product, position, top of book, up to four key signal values
+(Kalman deviation, z-scores, regime, ensemble weights, ...), the orders sent
+per side and the fills reported back in own_trades. Records go through a
+large buffered file writer, so journaling costs one struct pack per product
+per tick.
+
+Journaling is off unless the PROSPERITY_JOURNAL environment variable names a
+directory, in which case each round appends to <directory>/<round>_<run>.journal.
+The run name comes from PROSPERITY_JOURNAL_RUN, so a harness can give each day
+or replay its own file, and defaults to the process start time and pid so
+separate runs never share one. Submission builds ship a round file on its
+own, without this module, and the round skips journaling entirely.
+
+    from journal import read_journal
+    records = read_journal("journals/round1_day-2.journal")
+    pearls = records[records["product"] == b"PEARLS"]
+"""
+import atexit
+import os
+import struct
+import time
+
+
+JOURNAL_ENV = "PROSPERITY_JOURNAL"
+RUN_ENV = "PROSPERITY_JOURNAL_RUN"
+MAGIC = b"PRJL"
+VERSION = 1
+N_SIGNALS = 4
+BUFFER_SIZE = 1 << 20
+
+# (field, struct code, numpy dtype); little-endian and unpadded in both views
+FIELDS = [
+    ("timestamp", "q", "<i8"),
+    ("product", "24s", "S24"),
+    ("position", "i", "<i4"),
+    ("best_bid", "i", "<i4"),
+    ("best_ask", "i", "<i4"),
+    ("signals", "%dd" % N_SIGNALS, ("<f8", (N_SIGNALS,))),
+    ("buy_qty", "i", "<i4"),
+    ("buy_price", "d", "<f8"),
+    ("sell_qty", "i", "<i4"),
+    ("sell_price", "d", "<f8"),
+    ("filled_buy_qty", "i", "<i4"),
+    ("filled_buy_price", "d", "<f8"),
+    ("filled_sell_qty", "i", "<i4"),
+    ("filled_sell_price", "d", "<f8"),
+]
+
+RECORD = struct.Struct("<" + "".join(code for _, code, _ in FIELDS))
+HEADER = struct.Struct("<4sII")
+
+_NAN = float("nan")
+_NO_SIGNALS = (_NAN,) * N_SIGNALS
+
+# Run name used when PROSPERITY_JOURNAL_RUN is unset
+DEFAULT_RUN = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+# Open writers by path, shared by every Trader in the process (backtests build many)
+_writers = {}
+
+
+def _side_totals(quantities_prices):
+    """Total quantity and volume-weighted price of (quantity, price) pairs; NaN price when empty."""
+    total = 0
+    notional = 0.0
+    for quantity, price in quantities_prices:
+        total += quantity
+        notional += quantity * price
+    return total, (notional / total if total else _NAN)
+
+
+def _check_header(path, header):
+    """Raise ValueError unless `header` is a journal header for this version and record layout."""
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is too short for a journal header")
+    magic, version, record_size = HEADER.unpack(header[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a journal file")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(
+            f"{path} has journal version {version} with {record_size}-byte records, "
+            f"expected version {VERSION} with {RECORD.size}-byte records"
+        )
+
+
+class JournalWriter:
+    """
+    Buffered, append-only writer of fixed-size journal records. Appending to
+    an existing file is refused unless its header matches this version and
+    record layout and it holds whole records only.
+    """
+
+    def __init__(self, path, buffer_size=BUFFER_SIZE):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, "rb") as journal_file:
+                _check_header(path, journal_file.read(HEADER.size))
+            if (os.path.getsize(path) - HEADER.size) % RECORD.size:
+                raise ValueError(f"{path} ends in a partial record")
+        self.path = path
+        self.file = open(path, "ab", buffering=buffer_size)
+        if is_new:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        atexit.register(self.close)
+
+    def record(self, timestamp, product, position, best_bid, best_ask, signals, orders, own_trades):
+        """Append one record for `product` on this tick."""
+        signals = tuple(signals)[:N_SIGNALS]
+        if len(signals) < N_SIGNALS:
+            signals = signals + _NO_SIGNALS[len(signals):]
+
+        buy_qty, buy_price = _side_totals((order.quantity, order.price) for order in orders if order.quantity > 0)
+        sell_qty, sell_price = _side_totals((-order.quantity, order.price) for order in orders if order.quantity < 0)
+        filled_buy_qty, filled_buy_price = _side_totals(
+            (trade.quantity, trade.price) for trade in own_trades if trade.buyer == "SUBMISSION"
+        )
+        filled_sell_qty, filled_sell_price = _side_totals(
+            (trade.quantity, trade.price) for trade in own_trades if trade.seller == "SUBMISSION"
+        )
+
+        self.file.write(RECORD.pack(
+            timestamp, product.encode(), position, best_bid or 0, best_ask or 0, *signals,
+            buy_qty, buy_price, sell_qty, sell_price,
+            filled_buy_qty, filled_buy_price, filled_sell_qty, filled_sell_price
+        ))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def open_journal(name):
+    """Writer for <PROSPERITY_JOURNAL>/<name>_<run>.journal, or None when journaling is off."""
+    directory = os.environ.get(JOURNAL_ENV)
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    run = os.environ.get(RUN_ENV) or DEFAULT_RUN
+    path = os.path.join(directory, f"{name}_{run}.journal")
+    if path not in _writers or _writers[path].file.closed:
+        _writers[path] = JournalWriter(path)
+    return _writers[path]
+
+
+def record_dtype():
+    """NumPy structured dtype matching one journal record byte for byte."""
+    import numpy as np
+
+    return np.dtype([(name, dtype) for name, _, dtype in FIELDS])
+
+
+def read_journal(path):
+    """Load a whole journal file into a NumPy structured array with one row per record."""
+    import numpy as np
+
+    with open(path, "rb") as journal_file:
+        _check_header(path, journal_file.read(HEADER.size))
+
+    dtype = record_dtype()
+    n_records = (os.path.getsize(path) - HEADER.size) // dtype.itemsize
+    return np.fromfile(path, dtype=dtype, count=n_records, offset=HEADER.size)
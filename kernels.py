@@ -0,0 +1,156 @@
+"""
+Optional JIT backend for the hot loops in the round files.
+
+Each round defines its small numeric kernels as plain functions decorated with
+`jit`. When this module is importable and Numba is installed, `jit` compiles
+them with `numba.njit(cache=True)`, so compiled machine code is written to
+__pycache__ and reused by later processes instead of being recompiled on every
+cold start (set NUMBA_CACHE_DIR to move the cache). Submission builds ship a
+round file on its own, without this module, and the round falls back to an
+identity `jit`, so the same source runs as the pure-Python reference.
+
+Importing this module stays cheap: Numba is only imported, and a kernel only
+compiled, the first time that kernel is called. That first call still costs
+the Numba import and a cache load, about half a second, or several seconds
+when it has to compile; the Python kernels cost nothing up front.
+
+The backend is chosen by the PROSPERITY_KERNELS environment variable:
+- "auto" (default): Numba only for kernels already in Numba's on-disk cache,
+  so a cold start never pays for compilation; Python for everything else
+- "numba": require Numba and compile every kernel, failing loudly if Numba
+  is missing
+- "python": never compile, even when Numba is installed
+
+Run `python kernels.py` to compile every kernel, check that it agrees with
+its Python reference on random inputs, and fill the cache "auto" reads.
+"""
+import functools
+import glob
+import importlib
+import importlib.util
+import os
+import sys
+
+
+BACKEND_ENV = "PROSPERITY_KERNELS"
+
+
+def _select_backend():
+    requested = os.environ.get(BACKEND_ENV, "auto").lower()
+    if requested not in ("auto", "numba", "python"):
+        raise ValueError(f"{BACKEND_ENV} must be auto, numba or python, got {requested!r}")
+    if requested == "python":
+        return "python"
+
+    if importlib.util.find_spec("numba") is None:
+        if requested == "numba":
+            raise RuntimeError(f"{BACKEND_ENV}=numba but numba is not installed")
+        return "python"
+    return requested
+
+
+BACKEND = _select_backend()
+
+
+class LazyKernel:
+    """
+    Numba kernel compiled on its first call. The Python reference stays
+    available as `py_func`, matching numba's own dispatcher.
+    """
+
+    def __init__(self, func):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self.compiled = None
+
+    def __call__(self, *args):
+        if self.compiled is None:
+            numba = importlib.import_module("numba")
+            # Numba freezes globals at compile time, so lazily imported modules must be real by now
+            for name, value in list(self.py_func.__globals__.items()):
+                if type(value).__name__ == "LazyModule":
+                    value.load()
+            self.compiled = numba.njit(cache=True)(self.py_func)
+        return self.compiled(*args)
+
+
+def has_numba_cache(func):
+    """
+    Whether Numba's cache holds an index for `func`, either in __pycache__ next
+    to its source or under NUMBA_CACHE_DIR. The name follows Numba's own
+    <module>.<qualname>-<first line>.py<version>.nbi scheme; an index left
+    stale by a source edit still counts and is recompiled on first call.
+    """
+    source = func.__code__.co_filename
+    module = os.path.splitext(os.path.basename(source))[0]
+    index = f"{module}.{func.__qualname__}-{func.__code__.co_firstlineno}.py{sys.version_info[0]}{sys.version_info[1]}.nbi"
+    if os.path.exists(os.path.join(os.path.dirname(source), "__pycache__", index)):
+        return True
+    cache_dir = os.environ.get("NUMBA_CACHE_DIR")
+    return bool(cache_dir) and bool(glob.glob(os.path.join(glob.escape(cache_dir), "*", glob.escape(index))))
+
+
+def jit(func):
+    """
+    Compile `func` with Numba on first call when the numba backend is active,
+    or under auto when it is already cached; otherwise return it unchanged.
+    """
+    if BACKEND == "numba" or (BACKEND == "auto" and has_numba_cache(func)):
+        return LazyKernel(func)
+    return func
+
+
+# Kernels per round module with a generator of random arguments for each
+KERNEL_CASES = {
+    "round1": {
+        "kalman_update": lambda rng: (float(rng.normal(100, 5)), float(rng.uniform(0.01, 2)), float(rng.normal(100, 5)), 1.0),
+        "tail_mean_std": lambda rng: (rng.normal(100, 5, rng.integers(15, 50)), 15),
+    },
+    "round4": {
+        "local_extrema": lambda rng: (rng.integers(-2, 3, 80).cumsum() / 2.0,),
+    },
+    "round5": {
+        "window_stds": lambda rng: (rng.normal(100, 5, 100), 80, 90, 10),
+    },
+}
+
+
+def _agree(expected, actual):
+    import numpy as np
+
+    if isinstance(expected, tuple):
+        return len(expected) == len(actual) and all(_agree(e, a) for e, a in zip(expected, actual))
+    return np.allclose(np.asarray(expected, dtype=np.float64), np.asarray(actual, dtype=np.float64), rtol=1e-9, atol=1e-12)
+
+
+def check_backends(trials=200, seed=0):
+    """
+    Compile every kernel with Numba, whatever the active backend, and compare
+    it with its Python reference. Returns a list of (module, kernel, trial)
+    mismatches; empty means agreement. Needs Numba installed.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for module_name, cases in KERNEL_CASES.items():
+        module = importlib.import_module(module_name)
+        for kernel_name, make_args in cases.items():
+            kernel = getattr(module, kernel_name)
+            compiled = kernel if isinstance(kernel, LazyKernel) else LazyKernel(kernel)
+            for trial in range(trials):
+                args = make_args(rng)
+                if not _agree(compiled.py_func(*args), compiled(*args)):
+                    mismatches.append((module_name, kernel_name, trial))
+    return mismatches
+
+
+if __name__ == "__main__":
+    if importlib.util.find_spec("numba") is None:
+        print("kernels: numba is not installed, nothing to compare")
+    else:
+        mismatches = check_backends()
+        for module_name, kernel_name, trial in mismatches:
+            print(f"kernels: {module_name}.{kernel_name} disagrees on trial {trial}")
+        print(f"kernels: {BACKEND} backend, {len(mismatches)} mismatches")
+        raise SystemExit(1 if mismatches else 0)
@@ -1,12 +1,123 @@
 from datamodel import OrderDepth, UserId, TradingState, Order
 from typing import List, Dict
-import jsonpickle
+import importlib
 import math
-import statistics
-import numpy as np
+
+
+class LazyModule:
+    """
+    Placeholder for a heavy module that is imported on first attribute access
+    and then replaces itself in this module's globals. Importing the round,
+    and a cold first tick with no history yet, only pay for what they use.
+    """
+
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def load(self):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+jsonpickle = LazyModule("jsonpickle", "jsonpickle")
+np = LazyModule("numpy", "np")
+
+try:
+    from kernels import jit
+except ImportError:
+    # Submission builds ship this file alone; kernels then run as plain Python
+    def jit(func):
+        return func
+
+try:
+    from journal import open_journal
+except ImportError:
+    # Submission builds ship this file alone; decision journaling is unavailable
+    open_journal = None
+
+
+@jit
+def kalman_update(estimate, error, measurement, measurement_noise):
+    """One scalar Kalman step; returns the new (estimate, error)."""
+    gain = error / (error + measurement_noise)
+    return estimate + gain * (measurement - estimate), (1 - gain) * error
+
+
+@jit
+def tail_mean_std(prices, window):
+    """Mean and population standard deviation of the last `window` prices."""
+    n = len(prices)
+    start = max(n - window, 0)
+    total = 0.0
+    for i in range(start, n):
+        total += prices[i]
+    mean = total / (n - start)
+    squares = 0.0
+    for i in range(start, n):
+        squares += (prices[i] - mean) ** 2
+    return mean, math.sqrt(squares / (n - start))
+
+
+def book_signature(order_depth, trades, position, depth):
+    """
+    Cheap fingerprint of everything a strategy observes for one product:
+    the top `depth` book levels on each side, this tick's trades and our position.
+    """
+    bids = tuple(sorted(order_depth.buy_orders.items(), reverse=True)[:depth])
+    asks = tuple(sorted(order_depth.sell_orders.items())[:depth])
+    trade_key = tuple((trade.price, trade.quantity, trade.timestamp) for trade in trades)
+    return hash((bids, asks, trade_key, position))
+
+
+def new_hist_data():
+    """Preallocated state for a cold start, with every top-level container in place."""
+    return {
+        "prices": {},
+        "tick_cache": {},
+        "volumes": {},
+        "kalman_state": {}
+    }
 
 
 class Trader:
+    def __init__(self):
+        # Live hist_data from the previous call, kept alongside a fingerprint of the
+        # traderData string it was encoded to so an unchanged round trip skips decoding
+        self.cached_hist_data = None
+        self.cached_fingerprint = None
+        # Binary decision/fill journal, only when journal.py is present and enabled
+        self.journal = open_journal("round1") if open_journal is not None else None
+
+    def load_hist_data(self, trader_data):
+        """
+        Return hist_data for this tick, reusing the in-process copy when the
+        incoming traderData is the string this instance emitted last call.
+        Falls back to a full jsonpickle decode after a restart or on mismatch.
+        """
+        if not trader_data:
+            return new_hist_data()
+
+        fingerprint = (len(trader_data), hash(trader_data))
+        if self.cached_hist_data is not None and fingerprint == self.cached_fingerprint:
+            return self.cached_hist_data
+
+        try:
+            return jsonpickle.decode(trader_data)
+        except:
+            return new_hist_data()
+
+    def save_hist_data(self, hist_data):
+        """Encode hist_data to traderData and remember both for the next call."""
+        trader_data = jsonpickle.encode(hist_data)
+        self.cached_hist_data = hist_data
+        self.cached_fingerprint = (len(trader_data), hash(trader_data))
+        return trader_data
+
     def run(self, state: TradingState):
         """
         Round 1 Strategy: Momentum-Based Trading with Risk Management
@@ -16,16 +127,14 @@ class Trader:
         """
 
         # Initialize historical data storage
-        if state.traderData:
-            try:
-                hist_data = jsonpickle.decode(state.traderData)
-            except:
-                hist_data = {}
-        else:
-            hist_data = {}
+        hist_data = self.load_hist_data(state.traderData)
+        # hist_data is mutated in place below; drop the cache until it is re-encoded
+        self.cached_hist_data = None
 
         if "prices" not in hist_data:
             hist_data["prices"] = {}
+        if "tick_cache" not in hist_data:
+            hist_data["tick_cache"] = {}
         if "volumes" not in hist_data:
             hist_data["volumes"] = {}
         if "kalman_state" not in hist_data:
@@ -34,9 +143,19 @@ class Trader:
         result = {}
         POSITION_LIMIT = 20
         PRODUCTS = ["PEARLS", "BANANAS", "COCONUTS"]
+        # Opt-in tick de-duplication: when the top BOOK_DEPTH levels, trades and position
+        # are unchanged, replay the previous orders instead of appending a duplicate sample
+        BOOK_DEPTH = 3
+        TICK_DEDUP = {
+            "PEARLS": False,
+            "BANANAS": False,
+            "COCONUTS": False,
+        }
 
         for product in PRODUCTS:
             if product not in state.order_depths:
+                # Orders cached before a gap must not be replayed when the product returns
+                hist_data["tick_cache"].pop(product, None)
                 continue
 
             order_depth = state.order_depths[product]
@@ -47,6 +166,22 @@ class Trader:
             best_ask = min(order_depth.sell_orders.keys()) if order_depth.sell_orders else None
             mid_price = (best_bid + best_ask) / 2.0 if best_bid and best_ask else None
 
+            # Skip recomputation when nothing observable changed since the last tick
+            signature = None
+            if TICK_DEDUP.get(product, False):
+                trades = state.market_trades.get(product, []) + state.own_trades.get(product, [])
+                signature = book_signature(order_depth, trades, current_pos, BOOK_DEPTH)
+                tick_cache = hist_data["tick_cache"].get(product)
+                if tick_cache is not None and tick_cache["signature"] == signature:
+                    if tick_cache["orders"]:
+                        result[product] = [Order(product, price, qty) for price, qty in tick_cache["orders"]]
+                    if self.journal is not None:
+                        self.journal.record(
+                            state.timestamp, product, current_pos, best_bid, best_ask, (),
+                            result.get(product, []), state.own_trades.get(product, [])
+                        )
+                    continue
+
             # Update price history
             if mid_price is not None:
                 if product not in hist_data["prices"]:
@@ -55,6 +190,8 @@ class Trader:
                 hist_data["prices"][product] = hist_data["prices"][product][-50:]
 
             orders = []
+            # Key signal values behind this tick's orders, for the journal
+            journal_signals = ()
 
             # PEARLS: Statistical Arbitrage with Kalman Filter
             if product == "PEARLS":
@@ -68,14 +205,12 @@ class Trader:
                     kalman = hist_data["kalman_state"][product]
                     
                     # Kalman update
-                    measurement = mid_price
-                    kalman_gain = kalman["error"] / (kalman["error"] + 1.0)
-                    kalman["estimate"] = kalman["estimate"] + kalman_gain * (measurement - kalman["estimate"])
-                    kalman["error"] = (1 - kalman_gain) * kalman["error"]
+                    kalman["estimate"], kalman["error"] = kalman_update(kalman["estimate"], kalman["error"], mid_price, 1.0)
                     
                     # Trading logic based on deviation from Kalman estimate
                     deviation = mid_price - kalman["estimate"]
                     threshold = 0.5
+                    journal_signals = (deviation, kalman["estimate"], kalman["error"])
                     
                     if abs(deviation) > threshold:
                         if deviation > 0:  # Price above estimate, sell
@@ -100,8 +235,9 @@ class Trader:
                     momentum = short_ma - long_ma
                     
                     # Volatility-based position sizing
-                    volatility = np.std(prices[-10:])
+                    _, volatility = tail_mean_std(np.asarray(prices, dtype=np.float64), 10)
                     base_size = max(1, int(5 / (volatility + 0.1)))
+                    journal_signals = (momentum, volatility)
                     
                     if momentum > 0.5:  # Strong upward momentum
                         if best_ask and current_pos < POSITION_LIMIT:
@@ -121,14 +257,14 @@ class Trader:
                     
                     # Calculate Bollinger Bands
                     window = 15
-                    sma = np.mean(prices[-window:])
-                    std = np.std(prices[-window:])
+                    sma, std = tail_mean_std(np.asarray(prices, dtype=np.float64), window)
                     upper_band = sma + 2 * std
                     lower_band = sma - 2 * std
                     
                     # Position sizing based on volatility
                     volatility_ratio = std / sma if sma > 0 else 1
                     position_size = max(2, int(8 * volatility_ratio))
+                    journal_signals = ((mid_price - sma) / std if std > 0 else 0.0, sma, std)
                     
                     if mid_price > upper_band:  # Overbought, sell
                         if best_bid and current_pos > -POSITION_LIMIT:
@@ -141,9 +277,21 @@ class Trader:
                             if buy_qty > 0:
                                 orders.append(Order(product, best_ask, buy_qty))
 
+            if self.journal is not None:
+                self.journal.record(
+                    state.timestamp, product, current_pos, best_bid, best_ask, journal_signals,
+                    orders, state.own_trades.get(product, [])
+                )
+
+            if signature is not None:
+                hist_data["tick_cache"][product] = {
+                    "signature": signature,
+                    "orders": [(order.price, order.quantity) for order in orders]
+                }
+
             if len(orders) > 0:
                 result[product] = orders
 
         conversions = 0
-        traderData = jsonpickle.encode(hist_data)
+        traderData = self.save_hist_data(hist_data)
         return result, conversions, traderData
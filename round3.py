@@ -1,12 +1,300 @@
 from datamodel import OrderDepth, UserId, TradingState, Order
 from typing import List, Dict
-import jsonpickle
+import importlib
 import math
-import statistics
-import numpy as np
+
+
+class LazyModule:
+    """
+    Placeholder for a heavy module that is imported on first attribute access
+    and then replaces itself in this module's globals. Importing the round,
+    and a cold first tick with no history yet, only pay for what they use.
+    """
+
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def load(self):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+jsonpickle = LazyModule("jsonpickle", "jsonpickle")
+np = LazyModule("numpy", "np")
+
+try:
+    from journal import open_journal
+except ImportError:
+    # Submission builds ship this file alone; decision journaling is unavailable
+    open_journal = None
+
+# Raw mid prices kept for BAGUETTE and DIP, whose longest lookback is 25 ticks
+PRICE_WINDOW = 25
+# BAGUETTE regime statistics: variance-ratio lags, R/S block sizes, EW span, confidence to switch
+REGIME_LAGS = [1, 2, 4, 8]
+REGIME_BLOCKS = [8, 16, 32]
+REGIME_SPAN = 100
+REGIME_CONFIDENCE = 0.8
+# BAGUETTE trading: SMA deviation faded when mean reverting, MA cross followed when trending, lots per regime
+BAGUETTE_SMA = 20
+BAGUETTE_DEVIATION = 0.02
+BAGUETTE_FAST_MA = 5
+BAGUETTE_SLOW_MA = 15
+BAGUETTE_REVERSION_LOTS = 6
+BAGUETTE_TREND_LOTS = 4
+
+
+def book_signature(order_depth, trades, position, depth):
+    """
+    Cheap fingerprint of everything a strategy observes for one product:
+    the top `depth` book levels on each side, this tick's trades and our position.
+    """
+    bids = tuple(sorted(order_depth.buy_orders.items(), reverse=True)[:depth])
+    asks = tuple(sorted(order_depth.sell_orders.items())[:depth])
+    trade_key = tuple((trade.price, trade.quantity, trade.timestamp) for trade in trades)
+    return hash((bids, asks, trade_key, position))
+
+
+def new_bar_levels(bar_sizes, max_bars):
+    """
+    Empty state for a hierarchical OHLC aggregator. Each bar size must be a
+    multiple of the previous one; each level keeps at most `max_bars` completed
+    [open, high, low, close] bars plus the one currently being built.
+    """
+    return {
+        "sizes": list(bar_sizes),
+        "max_bars": max_bars,
+        "bars": [[] for _ in bar_sizes],
+        "partial": [None for _ in bar_sizes],
+        "counts": [0 for _ in bar_sizes]
+    }
+
+
+def update_bar_levels(levels, price):
+    """
+    Roll one tick into the aggregator. A completed bar at one level is fed
+    into the next, so each tick touches at most one bar per level.
+    """
+    sizes = levels["sizes"]
+    bar = [price, price, price, price]
+
+    for level in range(len(sizes)):
+        partial = levels["partial"][level]
+        if partial is None:
+            partial = list(bar)
+        else:
+            partial[1] = max(partial[1], bar[1])
+            partial[2] = min(partial[2], bar[2])
+            partial[3] = bar[3]
+        levels["counts"][level] += 1
+
+        children_per_bar = sizes[level] // sizes[level - 1] if level > 0 else sizes[0]
+        if levels["counts"][level] < children_per_bar:
+            levels["partial"][level] = partial
+            break
+
+        # Bar complete: store it and pass it up to the next timeframe
+        levels["bars"][level].append(partial)
+        levels["bars"][level] = levels["bars"][level][-levels["max_bars"]:]
+        levels["partial"][level] = None
+        levels["counts"][level] = 0
+        bar = partial
+
+
+def bar_trend(levels, bar_size, n_bars):
+    """Mean close of the last `n_bars` bars minus the open of the first of them, or None."""
+    bars = levels["bars"][levels["sizes"].index(bar_size)]
+    if len(bars) < n_bars:
+        return None
+    recent = bars[-n_bars:]
+    return np.mean([bar[3] for bar in recent]) - recent[0][0]
+
+
+def new_regime_stats(lags, block_sizes, span):
+    """
+    Empty streaming state for variance-ratio and rescaled-range Hurst
+    estimates. Lag-q price differences feed exponentially weighted moments
+    with the given span; one-tick returns are cut into blocks of each size
+    for R/S. Only the last max(lags) prices and the partial sums of the
+    block in progress are kept.
+    """
+    return {
+        "lags": list(lags),
+        "alpha": 2.0 / (span + 1),
+        "count": 0,
+        "recent": [],
+        "diff_mean": [0.0] * len(lags),
+        "diff_sq": [0.0] * len(lags),
+        "blocks": [
+            {"size": size, "path": [], "sum_sq": 0.0, "log_rs": None}
+            for size in block_sizes
+        ]
+    }
+
+
+def expected_log_rs(n):
+    """Anis-Lloyd expected log(R/S) of n i.i.d. returns, used to de-bias small blocks."""
+    gamma_ratio = math.exp(math.lgamma((n - 1) / 2.0) - math.lgamma(n / 2.0)) / math.sqrt(math.pi)
+    return math.log((n - 0.5) / n * gamma_ratio * sum(math.sqrt((n - i) / i) for i in range(1, n)))
+
+
+def update_regime_stats(stats, price):
+    """
+    Fold one price into the regime statistics: O(lags) for the moments, and
+    amortised O(1) per block size since each block is scanned once when full.
+    """
+    alpha = stats["alpha"]
+    recent = stats["recent"]
+
+    if recent:
+        ret = price - recent[-1]
+
+        for i, lag in enumerate(stats["lags"]):
+            if len(recent) >= lag:
+                diff = price - recent[-lag]
+                if stats["count"] < lag:
+                    stats["diff_mean"][i] = diff
+                    stats["diff_sq"][i] = diff * diff
+                else:
+                    stats["diff_mean"][i] += alpha * (diff - stats["diff_mean"][i])
+                    stats["diff_sq"][i] += alpha * (diff * diff - stats["diff_sq"][i])
+
+        for block in stats["blocks"]:
+            path = block["path"]
+            path.append(path[-1] + ret if path else ret)
+            block["sum_sq"] += ret * ret
+
+            if len(path) == block["size"]:
+                # Range of cumulative deviations from the block mean
+                n = len(path)
+                mean = path[-1] / n
+                deviations = [total - (k + 1) * mean for k, total in enumerate(path)]
+                variance = block["sum_sq"] / n - mean ** 2
+                value_range = max(deviations) - min(deviations)
+                if variance > 0 and value_range > 0:
+                    excess = math.log(value_range / math.sqrt(variance)) - expected_log_rs(n)
+                    if block["log_rs"] is None:
+                        block["log_rs"] = excess
+                    else:
+                        block["log_rs"] += 0.2 * (excess - block["log_rs"])
+                block["path"] = []
+                block["sum_sq"] = 0.0
+
+        stats["count"] += 1
+
+    recent.append(price)
+    stats["recent"] = recent[-max(stats["lags"]):]
+
+
+def variance_ratios(stats):
+    """
+    Variance ratio Var(lag-q diff) / (q * Var(lag-1 diff)) for every lag
+    after the first. Above 1 means persistence, below 1 mean reversion.
+    """
+    if stats["count"] < 2 * max(stats["lags"]):
+        return None
+
+    base_var = stats["diff_sq"][0] - stats["diff_mean"][0] ** 2
+    if base_var <= 0:
+        return None
+
+    ratios = []
+    for i, lag in enumerate(stats["lags"][1:], start=1):
+        lag_var = stats["diff_sq"][i] - stats["diff_mean"][i] ** 2
+        ratios.append(lag_var / (lag / stats["lags"][0] * base_var))
+    return ratios
+
+
+def rescaled_range_hurst(stats):
+    """Hurst exponent from the slope of de-biased log(R/S) against log block size."""
+    points = [(math.log(block["size"]), block["log_rs"]) for block in stats["blocks"] if block["log_rs"] is not None]
+    if len(points) < 2:
+        return None
+
+    x_mean = sum(x for x, _ in points) / len(points)
+    y_mean = sum(y for _, y in points) / len(points)
+    denom = sum((x - x_mean) ** 2 for x, _ in points)
+    slope = sum((x - x_mean) * (y - y_mean) for x, y in points) / denom
+    return 0.5 + slope
+
+
+def classify_regime(stats, hurst_band=0.05):
+    """
+    Drop-in regime classifier returning (regime, confidence). The regime is
+    "trending" or "mean_reverting" when the variance ratios and the Hurst
+    exponent agree, otherwise "random_walk". Confidence is the two-sided
+    probability from the Lo-MacKinlay statistic averaged across lags.
+    """
+    ratios = variance_ratios(stats)
+    hurst = rescaled_range_hurst(stats)
+    if ratios is None or hurst is None:
+        return "unknown", 0.0
+
+    n_eff = 2.0 / stats["alpha"] - 1
+    z_scores = []
+    for ratio, lag in zip(ratios, stats["lags"][1:]):
+        q = lag / stats["lags"][0]
+        z_scores.append((ratio - 1) / math.sqrt(2 * (2 * q - 1) * (q - 1) / (3 * q * n_eff)))
+    z = sum(z_scores) / len(z_scores)
+    significance = math.erf(abs(z) / math.sqrt(2))
+
+    if z > 0 and hurst > 0.5 + hurst_band:
+        return "trending", significance
+    if z < 0 and hurst < 0.5 - hurst_band:
+        return "mean_reverting", significance
+    return "random_walk", 1 - significance
+
+
+def new_hist_data():
+    """Preallocated state for a cold start, with every top-level container in place."""
+    return {
+        "prices": {},
+        "tick_cache": {},
+        "regime_data": {},
+        "correlation_data": {},
+        "bar_data": {}
+    }
 
 
 class Trader:
+    def __init__(self):
+        # Live hist_data from the previous call, kept alongside a fingerprint of the
+        # traderData string it was encoded to so an unchanged round trip skips decoding
+        self.cached_hist_data = None
+        self.cached_fingerprint = None
+        # Binary decision/fill journal, only when journal.py is present and enabled
+        self.journal = open_journal("round3") if open_journal is not None else None
+
+    def load_hist_data(self, trader_data):
+        """
+        Return hist_data for this tick, reusing the in-process copy when the
+        incoming traderData is the string this instance emitted last call.
+        Falls back to a full jsonpickle decode after a restart or on mismatch.
+        """
+        if not trader_data:
+            return new_hist_data()
+
+        fingerprint = (len(trader_data), hash(trader_data))
+        if self.cached_hist_data is not None and fingerprint == self.cached_fingerprint:
+            return self.cached_hist_data
+
+        try:
+            return jsonpickle.decode(trader_data)
+        except:
+            return new_hist_data()
+
+    def save_hist_data(self, hist_data):
+        """Encode hist_data to traderData and remember both for the next call."""
+        trader_data = jsonpickle.encode(hist_data)
+        self.cached_hist_data = hist_data
+        self.cached_fingerprint = (len(trader_data), hash(trader_data))
+        return trader_data
+
     def run(self, state: TradingState):
         """
         Round 3 Strategy: Multi-Timeframe Analysis and Adaptive Strategies
@@ -16,27 +304,42 @@ class Trader:
         """
 
         # Initialize historical data storage
-        if state.traderData:
-            try:
-                hist_data = jsonpickle.decode(state.traderData)
-            except:
-                hist_data = {}
-        else:
-            hist_data = {}
+        hist_data = self.load_hist_data(state.traderData)
+        # hist_data is mutated in place below; drop the cache until it is re-encoded
+        self.cached_hist_data = None
 
         if "prices" not in hist_data:
             hist_data["prices"] = {}
+        if "tick_cache" not in hist_data:
+            hist_data["tick_cache"] = {}
         if "regime_data" not in hist_data:
             hist_data["regime_data"] = {}
         if "correlation_data" not in hist_data:
             hist_data["correlation_data"] = {}
+        if "bar_data" not in hist_data:
+            hist_data["bar_data"] = {}
 
         result = {}
         POSITION_LIMIT = 25
         PRODUCTS = ["DOLPHIN_SIGHTINGS", "BAGUETTE", "DIP"]
+        # Multi-timeframe bars: 1/5/25-tick levels, 10 bars each (the most any reader needs)
+        BAR_SIZES = [1, 5, 25]
+        MAX_BARS = 10
+        # (bar size, bars per trend, weight) for short, medium and long timeframes
+        TIMEFRAMES = [(1, 5, 0.5), (5, 3, 0.3), (25, 2, 0.2)]
+        # Opt-in tick de-duplication: when the top BOOK_DEPTH levels, trades and position
+        # are unchanged, replay the previous orders instead of appending a duplicate sample
+        BOOK_DEPTH = 3
+        TICK_DEDUP = {
+            "DOLPHIN_SIGHTINGS": False,
+            "BAGUETTE": False,
+            "DIP": False,
+        }
 
         for product in PRODUCTS:
             if product not in state.order_depths:
+                # Orders cached before a gap must not be replayed when the product returns
+                hist_data["tick_cache"].pop(product, None)
                 continue
 
             order_depth = state.order_depths[product]
@@ -47,38 +350,50 @@ class Trader:
             best_ask = min(order_depth.sell_orders.keys()) if order_depth.sell_orders else None
             mid_price = (best_bid + best_ask) / 2.0 if best_bid and best_ask else None
 
-            # Update price history
-            if mid_price is not None:
+            # Skip recomputation when nothing observable changed since the last tick
+            signature = None
+            if TICK_DEDUP.get(product, False):
+                trades = state.market_trades.get(product, []) + state.own_trades.get(product, [])
+                signature = book_signature(order_depth, trades, current_pos, BOOK_DEPTH)
+                tick_cache = hist_data["tick_cache"].get(product)
+                if tick_cache is not None and tick_cache["signature"] == signature:
+                    if tick_cache["orders"]:
+                        result[product] = [Order(product, price, qty) for price, qty in tick_cache["orders"]]
+                    if self.journal is not None:
+                        self.journal.record(
+                            state.timestamp, product, current_pos, best_bid, best_ask, (),
+                            result.get(product, []), state.own_trades.get(product, [])
+                        )
+                    continue
+
+            # Update price history; DOLPHIN_SIGHTINGS reads only its bars
+            if mid_price is not None and product != "DOLPHIN_SIGHTINGS":
                 if product not in hist_data["prices"]:
                     hist_data["prices"][product] = []
                 hist_data["prices"][product].append(mid_price)
-                hist_data["prices"][product] = hist_data["prices"][product][-60:]
+                hist_data["prices"][product] = hist_data["prices"][product][-PRICE_WINDOW:]
 
             orders = []
+            # Key signal values behind this tick's orders, for the journal
+            journal_signals = ()
 
             # DOLPHIN_SIGHTINGS: Multi-Timeframe Trend Analysis
             if product == "DOLPHIN_SIGHTINGS":
-                if len(hist_data["prices"][product]) >= 30:
-                    prices = hist_data["prices"][product]
-                    
-                    # Short-term trend (5 periods)
-                    short_ma = np.mean(prices[-5:])
-                    short_trend = short_ma - prices[-5]
-                    
-                    # Medium-term trend (15 periods)
-                    medium_ma = np.mean(prices[-15:])
-                    medium_trend = medium_ma - prices[-15]
-                    
-                    # Long-term trend (30 periods)
-                    long_ma = np.mean(prices[-30:])
-                    long_trend = long_ma - prices[-30]
-                    
-                    # Multi-timeframe consensus
-                    trend_score = (short_trend * 0.5 + medium_trend * 0.3 + long_trend * 0.2)
+                if mid_price is not None:
+                    if product not in hist_data["bar_data"]:
+                        hist_data["bar_data"][product] = new_bar_levels(BAR_SIZES, MAX_BARS)
+                    update_bar_levels(hist_data["bar_data"][product], mid_price)
+
+                bar_levels = hist_data["bar_data"].get(product)
+                trends = [bar_trend(bar_levels, size, n_bars) for size, n_bars, _ in TIMEFRAMES] if bar_levels else [None]
+                if None not in trends:
+                    # Multi-timeframe consensus over short, medium and long bars
+                    trend_score = sum(trend * weight for trend, (_, _, weight) in zip(trends, TIMEFRAMES))
                     
                     # Volatility-adjusted position sizing
-                    volatility = np.std(prices[-10:])
+                    volatility = np.std([bar[3] for bar in bar_levels["bars"][0][-10:]])
                     base_size = max(2, int(8 / (volatility + 0.1)))
+                    journal_signals = (trend_score, volatility)
                     
                     if trend_score > 0.5:  # Strong upward trend across timeframes
                         if best_ask and current_pos < POSITION_LIMIT:
@@ -93,61 +408,62 @@ class Trader:
 
             # BAGUETTE: Adaptive Mean Reversion with Regime Detection
             elif product == "BAGUETTE":
-                if len(hist_data["prices"][product]) >= 20:
+                if product not in hist_data["regime_data"]:
+                    hist_data["regime_data"][product] = {
+                        "regime": "unknown",
+                        "confidence": 0,
+                        "stats": new_regime_stats(REGIME_LAGS, REGIME_BLOCKS, REGIME_SPAN)
+                    }
+                
+                regime_data = hist_data["regime_data"][product]
+                if mid_price is not None:
+                    update_regime_stats(regime_data["stats"], mid_price)
+                
+                if len(hist_data["prices"][product]) >= BAGUETTE_SMA:
                     prices = hist_data["prices"][product]
                     
-                    # Detect market regime (trending vs mean-reverting)
-                    if product not in hist_data["regime_data"]:
-                        hist_data["regime_data"][product] = {"regime": "unknown", "regime_score": 0}
-                    
-                    regime_data = hist_data["regime_data"][product]
+                    # Detect market regime (trending vs mean-reverting) from variance ratios and Hurst
+                    regime, confidence = classify_regime(regime_data["stats"])
+                    regime_data["confidence"] = confidence
                     
-                    # Calculate regime indicators
-                    price_change = prices[-1] - prices[-20]
-                    volatility = np.std(prices[-10:])
-                    mean_reversion_strength = abs(prices[-1] - np.mean(prices[-20:])) / volatility if volatility > 0 else 0
-                    
-                    # Update regime score
-                    regime_score = regime_data["regime_score"] * 0.9 + mean_reversion_strength * 0.1
-                    regime_data["regime_score"] = regime_score
-                    
-                    # Determine regime
-                    if regime_score > 1.5:
-                        regime_data["regime"] = "trending"
-                    elif regime_score < 0.5:
-                        regime_data["regime"] = "mean_reverting"
+                    # Switch only on a confident call; otherwise keep the previous regime
+                    if regime in ("trending", "mean_reverting") and confidence >= REGIME_CONFIDENCE:
+                        regime_data["regime"] = regime
+                    # Regime as +1 trending, -1 mean reverting, 0 undecided
+                    regime_code = {"trending": 1.0, "mean_reverting": -1.0}.get(regime_data["regime"], 0.0)
+                    journal_signals = (regime_code, confidence)
                     
                     # Trading logic based on regime
                     if regime_data["regime"] == "mean_reverting":
                         # Traditional mean reversion
-                        sma = np.mean(prices[-20:])
+                        sma = np.mean(prices[-BAGUETTE_SMA:])
                         deviation = (mid_price - sma) / sma
                         
-                        if abs(deviation) > 0.02:  # 2% deviation
+                        if abs(deviation) > BAGUETTE_DEVIATION:
                             if deviation > 0:  # Overvalued, sell
                                 if best_bid and current_pos > -POSITION_LIMIT:
-                                    sell_qty = min(6, POSITION_LIMIT + current_pos)
+                                    sell_qty = min(BAGUETTE_REVERSION_LOTS, POSITION_LIMIT + current_pos)
                                     if sell_qty > 0:
                                         orders.append(Order(product, best_bid, -sell_qty))
                             else:  # Undervalued, buy
                                 if best_ask and current_pos < POSITION_LIMIT:
-                                    buy_qty = min(6, POSITION_LIMIT - current_pos)
+                                    buy_qty = min(BAGUETTE_REVERSION_LOTS, POSITION_LIMIT - current_pos)
                                     if buy_qty > 0:
                                         orders.append(Order(product, best_ask, buy_qty))
                     
                     elif regime_data["regime"] == "trending":
                         # Trend following
-                        short_ma = np.mean(prices[-5:])
-                        long_ma = np.mean(prices[-15:])
+                        short_ma = np.mean(prices[-BAGUETTE_FAST_MA:])
+                        long_ma = np.mean(prices[-BAGUETTE_SLOW_MA:])
                         
                         if short_ma > long_ma:  # Uptrend
                             if best_ask and current_pos < POSITION_LIMIT:
-                                buy_qty = min(4, POSITION_LIMIT - current_pos)
+                                buy_qty = min(BAGUETTE_TREND_LOTS, POSITION_LIMIT - current_pos)
                                 if buy_qty > 0:
                                     orders.append(Order(product, best_ask, buy_qty))
                         else:  # Downtrend
                             if best_bid and current_pos > -POSITION_LIMIT:
-                                sell_qty = min(4, POSITION_LIMIT + current_pos)
+                                sell_qty = min(BAGUETTE_TREND_LOTS, POSITION_LIMIT + current_pos)
                                 if sell_qty > 0:
                                     orders.append(Order(product, best_bid, -sell_qty))
 
@@ -182,6 +498,7 @@ class Trader:
                                     
                                     if spread_std > 0:
                                         z_score = (spread - spread_mean) / spread_std
+                                        journal_signals = (z_score, correlation, spread)
                                         
                                         if z_score > 1.5:  # Spread too wide, sell DIP
                                             if best_bid and current_pos > -POSITION_LIMIT:
@@ -194,9 +511,21 @@ class Trader:
                                                 if buy_qty > 0:
                                                     orders.append(Order(product, best_ask, buy_qty))
 
+            if self.journal is not None:
+                self.journal.record(
+                    state.timestamp, product, current_pos, best_bid, best_ask, journal_signals,
+                    orders, state.own_trades.get(product, [])
+                )
+
+            if signature is not None:
+                hist_data["tick_cache"][product] = {
+                    "signature": signature,
+                    "orders": [(order.price, order.quantity) for order in orders]
+                }
+
             if len(orders) > 0:
                 result[product] = orders
 
         conversions = 0
-        traderData = jsonpickle.encode(hist_data)
+        traderData = self.save_hist_data(hist_data)
         return result, conversions, traderData 
\ No newline at end of file
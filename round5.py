@@ -1,12 +1,406 @@
 from datamodel import OrderDepth, UserId, TradingState, Order
 from typing import List, Dict
-import jsonpickle
+import base64
+import importlib
 import math
-import statistics
-import numpy as np
+
+
+class LazyModule:
+    """
+    Placeholder for a heavy module that is imported on first attribute access
+    and then replaces itself in this module's globals. Importing the round,
+    and a cold first tick with no history yet, only pay for what they use.
+    """
+
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def load(self):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+jsonpickle = LazyModule("jsonpickle", "jsonpickle")
+np = LazyModule("numpy", "np")
+
+try:
+    from kernels import jit
+except ImportError:
+    # Submission builds ship this file alone; kernels then run as plain Python
+    def jit(func):
+        return func
+
+try:
+    from journal import open_journal
+except ImportError:
+    # Submission builds ship this file alone; decision journaling is unavailable
+    open_journal = None
+
+
+@jit
+def window_stds(prices, start, stop, window):
+    """Population standard deviation of prices[i:i + window] for each i in [start, stop)."""
+    stds = np.empty(stop - start)
+    for k in range(stop - start):
+        i = start + k
+        total = 0.0
+        for j in range(i, i + window):
+            total += prices[j]
+        mean = total / window
+        squares = 0.0
+        for j in range(i, i + window):
+            squares += (prices[j] - mean) ** 2
+        stds[k] = math.sqrt(squares / window)
+    return stds
+
+
+def book_signature(order_depth, trades, position, depth):
+    """
+    Cheap fingerprint of everything a strategy observes for one product:
+    the top `depth` book levels on each side, this tick's trades and our position.
+    """
+    bids = tuple(sorted(order_depth.buy_orders.items(), reverse=True)[:depth])
+    asks = tuple(sorted(order_depth.sell_orders.items())[:depth])
+    trade_key = tuple((trade.price, trade.quantity, trade.timestamp) for trade in trades)
+    return hash((bids, asks, trade_key, position))
+
+
+def new_sliding_dft(window, bins):
+    """
+    Empty sliding-DFT state over the last `window` samples for the given
+    frequency bins (bin k has period window / k). Samples are first-differenced
+    before entering the window, so a drifting level does not leak power into
+    the low bins. The spectrum is kept as separate real and imaginary lists so
+    it round-trips through traderData.
+    """
+    return {
+        "window": window,
+        "bins": list(bins),
+        "ring": [0.0] * window,
+        "pos": 0,
+        "count": 0,
+        "last": None,
+        "re": [0.0] * len(bins),
+        "im": [0.0] * len(bins)
+    }
+
+
+def update_sliding_dft(dft, sample):
+    """
+    Slide the window forward by one sample, updating every tracked bin in
+    O(bins). The window holds the change since the previous sample (zero for
+    the first one). The spectrum is recomputed exactly once per full window so
+    rounding drift cannot accumulate.
+    """
+    window = dft["window"]
+    bins = np.array(dft["bins"])
+
+    last = dft["last"]
+    dft["last"] = sample
+    sample = sample - last if last is not None else 0.0
+
+    oldest = dft["ring"][dft["pos"]]
+    dft["ring"][dft["pos"]] = sample
+    dft["pos"] = (dft["pos"] + 1) % window
+    dft["count"] += 1
+
+    if dft["pos"] == 0:
+        # Ring is in chronological order right after wrapping
+        n = np.arange(window)
+        spectrum = np.exp(-2j * np.pi * np.outer(bins, n) / window) @ np.array(dft["ring"])
+    else:
+        spectrum = np.array(dft["re"]) + 1j * np.array(dft["im"])
+        spectrum = (spectrum + (sample - oldest)) * np.exp(2j * np.pi * bins / window)
+
+    dft["re"] = spectrum.real.tolist()
+    dft["im"] = spectrum.imag.tolist()
+
+
+def dominant_cycle(dft):
+    """
+    Strongest tracked cycle as (period, phase, amplitude, strength).
+    Phase and amplitude describe the cycle in the level series, undoing the
+    gain and phase lead of the first difference; phase is the cycle's angle at
+    the newest sample (0 = peak, pi = trough). Strength is the dominant bin's
+    share of power across the tracked bins; white noise spreads power evenly,
+    so it averages about 1 / len(bins).
+    """
+    window = dft["window"]
+    spectrum = np.array(dft["re"]) + 1j * np.array(dft["im"])
+    power = np.abs(spectrum) ** 2
+    total_power = np.sum(power)
+    if total_power <= 0:
+        return None, 0.0, 0.0, 0.0
+
+    idx = int(np.argmax(power))
+    k = dft["bins"][idx]
+    period = window / k
+    omega = 2 * np.pi * k / window
+    # x[n] - x[n-1] scales a cycle by 2 sin(omega / 2) and leads it by (pi - omega) / 2
+    phase = (np.angle(spectrum[idx]) - omega - (np.pi - omega) / 2) % (2 * np.pi)
+    amplitude = 2 * np.abs(spectrum[idx]) / window / (2 * np.sin(omega / 2))
+    return period, phase, amplitude, power[idx] / total_power
+
+
+def new_weight_learner(initial_weights, learning_rate, span):
+    """
+    Online signal-weight learner (multiplicative weights over positive and
+    negative copies of each signal). Weights apply to each signal divided by
+    its own exponentially weighted RMS, so columns of any scale can be mixed.
+    They start close to `initial_weights`, keep the same total absolute size,
+    and move towards the signals that predicted the realised next-tick return.
+    Works for any number of columns.
+    """
+    n_signals = len(initial_weights)
+    scale = sum(abs(weight) for weight in initial_weights) or 1.0
+    # A little uniform mass on both sides lets every weight grow or change sign
+    floor = 0.05 / (2 * n_signals)
+    return {
+        "scale": scale,
+        "learning_rate": learning_rate,
+        "alpha": 2.0 / (span + 1),
+        "pos": [0.95 * max(weight, 0) / scale + floor for weight in initial_weights],
+        "neg": [0.95 * max(-weight, 0) / scale + floor for weight in initial_weights],
+        "count": 0,
+        "signal_sq": [0.0] * n_signals,
+        "return_sq": 0.0,
+        "pending": None,
+        "last_price": None
+    }
+
+
+def learner_weights(learner):
+    """Current signed signal weights."""
+    return (learner["scale"] * (np.array(learner["pos"]) - np.array(learner["neg"]))).tolist()
+
+
+def update_weight_learner(learner, signals, price):
+    """
+    Score the previous tick's signals against the return realised since then,
+    store this tick's signals for the next update, and return the weighted
+    prediction. The prediction combines this tick's signals in units of their
+    RMS, the same normalisation the weights are learned on, so it is a score
+    rather than a return: 1 means the weighted signals sit one typical size
+    in the predicted direction. It is 0 until a first return has been scored.
+    O(signals) per call.
+    """
+    signals = np.asarray(signals, dtype=float)
+    pos = np.array(learner["pos"])
+    neg = np.array(learner["neg"])
+    alpha = learner["alpha"]
+
+    if learner["pending"] is not None and learner["last_price"]:
+        previous = np.array(learner["pending"])
+        realized = (price - learner["last_price"]) / learner["last_price"]
+
+        signal_sq = (1 - alpha) * np.array(learner["signal_sq"]) + alpha * previous ** 2
+        learner["signal_sq"] = signal_sq.tolist()
+        learner["return_sq"] = (1 - alpha) * learner["return_sq"] + alpha * realized ** 2
+        learner["count"] += 1
+
+        # Reward each column by how well it called the move, in units of its own RMS
+        # and the return's RMS so columns of very different scale are comparable
+        return_scale = math.sqrt(learner["return_sq"])
+        signal_scale = np.sqrt(signal_sq)
+        if return_scale > 0:
+            normalized = np.where(signal_scale > 0, previous / np.where(signal_scale > 0, signal_scale, 1), 0.0)
+            gradient = -np.clip(normalized * realized / return_scale, -5, 5)
+            pos = pos * np.exp(-learner["learning_rate"] * gradient)
+            neg = neg * np.exp(learner["learning_rate"] * gradient)
+            total = np.sum(pos) + np.sum(neg)
+            pos, neg = pos / total, neg / total
+            learner["pos"] = pos.tolist()
+            learner["neg"] = neg.tolist()
+
+    learner["pending"] = signals.tolist()
+    learner["last_price"] = price
+    if learner["count"] == 0:
+        return 0.0
+
+    # Debiased RMS, since the moving averages start from zero
+    signal_scale = np.sqrt(np.array(learner["signal_sq"]) / (1 - (1 - alpha) ** learner["count"]))
+    normalized = np.where(signal_scale > 0, signals / np.where(signal_scale > 0, signal_scale, 1), 0.0)
+    return float(learner["scale"] * (pos - neg) @ normalized)
+
+
+def pack_symmetric(matrix):
+    """Upper triangle of a symmetric matrix as base64 float32 bytes, a tenth the size of nested JSON lists."""
+    upper = np.asarray(matrix)[np.triu_indices(len(matrix))]
+    return base64.b64encode(upper.astype(np.float32).tobytes()).decode("ascii")
+
+
+def unpack_symmetric(packed, n):
+    """Inverse of pack_symmetric for an n x n matrix, as float64."""
+    upper = np.frombuffer(base64.b64decode(packed), dtype=np.float32)
+    matrix = np.zeros((n, n))
+    matrix[np.triu_indices(n)] = upper
+    return matrix + np.triu(matrix, 1).T
+
+
+def new_risk_parity(products, span, shrinkage):
+    """
+    Portfolio sizing state: an exponentially weighted covariance of per-unit
+    price changes across `products` (packed, see pack_symmetric), the last
+    unnormalised risk-parity solution used to warm-start the solver, and the
+    weights normalised to 1.
+    """
+    n_products = len(products)
+    return {
+        "products": list(products),
+        "alpha": 2.0 / (span + 1),
+        "shrinkage": shrinkage,
+        "count": 0,
+        "last": [None] * n_products,
+        "mean": [0.0] * n_products,
+        # All-zero float32 triangle in pack_symmetric's layout, built without numpy
+        # so a cold first tick stays clear of the import
+        "cov": base64.b64encode(bytes(4 * n_products * (n_products + 1) // 2)).decode("ascii"),
+        "solution": [1.0 / n_products] * n_products,
+        "weights": [1.0 / n_products] * n_products
+    }
+
+
+def risk_parity_weights(cov, weights, max_steps, tolerance):
+    """
+    Equal-risk-contribution solution by Newton steps on the convex
+    0.5 * w'Cw - sum(log w) / n, starting from `weights`. Unlike coordinate
+    descent, Newton does not crawl when products are strongly correlated.
+    Each step solves one n x n system, O(n^3) but in LAPACK, and is halved
+    until no weight falls below half its value. Steps stop once no weight
+    moves by more than `tolerance` of itself: about three warm-started from
+    the previous tick (rescaled so w'Cw = 1, as at every optimum), under ten
+    from scratch. Products with no variance yet keep their weight. The
+    result is unnormalised so it can seed the next call.
+    """
+    budget = 1.0 / len(weights)
+    w = np.array(weights, dtype=float)
+    active = np.diag(cov) > 0
+    if not active.any():
+        return w
+    sub_cov = cov[np.ix_(active, active)]
+    x = w[active]
+    x = x / math.sqrt(max(x @ sub_cov @ x, 1e-300))
+
+    for _ in range(max_steps):
+        gradient = sub_cov @ x - budget / x
+        step = np.linalg.solve(sub_cov + np.diag(budget / x ** 2), gradient)
+        while np.any(step > 0.5 * x):
+            step = 0.5 * step
+        x = x - step
+        if np.max(np.abs(step) / x) < tolerance:
+            break
+
+    w[active] = x
+    return w
+
+
+def update_risk_parity(model, mids, max_steps, tolerance):
+    """
+    Fold this tick's mids into the covariance, shrink it towards its diagonal
+    and run the warm-started solver to `tolerance`. Products without a mid
+    this tick count as unchanged.
+    """
+    alpha = model["alpha"]
+    last = model["last"]
+    changes = [0.0] * len(model["products"])
+    seen_before = False
+    for i, product in enumerate(model["products"]):
+        if product in mids:
+            if last[i] is not None:
+                changes[i] = mids[product] - last[i]
+                seen_before = True
+            last[i] = mids[product]
+
+    if not seen_before:
+        return
+
+    mean = np.array(model["mean"])
+    delta = np.array(changes) - mean
+    mean += alpha * delta
+    cov = unpack_symmetric(model["cov"], len(mean))
+    cov = (1 - alpha) * (cov + alpha * np.outer(delta, delta))
+
+    shrunk = (1 - model["shrinkage"]) * cov + model["shrinkage"] * np.diag(np.diag(cov))
+    solution = risk_parity_weights(shrunk, model["solution"], max_steps, tolerance)
+
+    model["count"] += 1
+    model["mean"] = mean.tolist()
+    model["cov"] = pack_symmetric(cov)
+    model["solution"] = solution.tolist()
+    model["weights"] = (solution / np.sum(solution)).tolist()
+
+
+def risk_parity_lots(model, total_lots, position_limit, min_count):
+    """
+    Per-product order sizes splitting `total_lots` by risk-parity weight, or
+    {} while warming up. Lots are rounded by largest remainder so they sum to
+    `total_lots` exactly before the `position_limit` cap; with more products
+    than lots, the smallest weights get 0.
+    """
+    if model["count"] < min_count:
+        return {}
+    shares = np.array(model["weights"]) * total_lots
+    lots = np.floor(shares).astype(int)
+    remainder = total_lots - int(lots.sum())
+    if remainder > 0:
+        lots[np.argsort(lots - shares, kind="stable")[:remainder]] += 1
+    return {
+        product: min(position_limit, int(lot))
+        for product, lot in zip(model["products"], lots)
+    }
+
+
+def new_hist_data():
+    """Preallocated state for a cold start, with every top-level container in place."""
+    return {
+        "prices": {},
+        "tick_cache": {},
+        "ensemble_signals": {},
+        "risk_metrics": {},
+        "time_data": {},
+        "portfolio": {}
+    }
 
 
 class Trader:
+    def __init__(self):
+        # Live hist_data from the previous call, kept alongside a fingerprint of the
+        # traderData string it was encoded to so an unchanged round trip skips decoding
+        self.cached_hist_data = None
+        self.cached_fingerprint = None
+        # Binary decision/fill journal, only when journal.py is present and enabled
+        self.journal = open_journal("round5") if open_journal is not None else None
+
+    def load_hist_data(self, trader_data):
+        """
+        Return hist_data for this tick, reusing the in-process copy when the
+        incoming traderData is the string this instance emitted last call.
+        Falls back to a full jsonpickle decode after a restart or on mismatch.
+        """
+        if not trader_data:
+            return new_hist_data()
+
+        fingerprint = (len(trader_data), hash(trader_data))
+        if self.cached_hist_data is not None and fingerprint == self.cached_fingerprint:
+            return self.cached_hist_data
+
+        try:
+            return jsonpickle.decode(trader_data)
+        except:
+            return new_hist_data()
+
+    def save_hist_data(self, hist_data):
+        """Encode hist_data to traderData and remember both for the next call."""
+        trader_data = jsonpickle.encode(hist_data)
+        self.cached_hist_data = hist_data
+        self.cached_fingerprint = (len(trader_data), hash(trader_data))
+        return trader_data
+
     def run(self, state: TradingState):
         """
         Round 5 Strategy: Ensemble Methods and Advanced Risk Management
@@ -16,29 +410,67 @@ class Trader:
         """
 
         # Initialize historical data storage
-        if state.traderData:
-            try:
-                hist_data = jsonpickle.decode(state.traderData)
-            except:
-                hist_data = {}
-        else:
-            hist_data = {}
+        hist_data = self.load_hist_data(state.traderData)
+        # hist_data is mutated in place below; drop the cache until it is re-encoded
+        self.cached_hist_data = None
 
         if "prices" not in hist_data:
             hist_data["prices"] = {}
+        if "tick_cache" not in hist_data:
+            hist_data["tick_cache"] = {}
         if "ensemble_signals" not in hist_data:
             hist_data["ensemble_signals"] = {}
         if "risk_metrics" not in hist_data:
             hist_data["risk_metrics"] = {}
         if "time_data" not in hist_data:
             hist_data["time_data"] = {}
+        if "portfolio" not in hist_data:
+            hist_data["portfolio"] = {}
 
         result = {}
         POSITION_LIMIT = 35
         PRODUCTS = ["COCONUT_COUPON", "INVENTORY", "SUNDIAL"]
+        # Opt-in tick de-duplication: when the top BOOK_DEPTH levels, trades and position
+        # are unchanged, replay the previous orders instead of appending a duplicate sample
+        BOOK_DEPTH = 3
+        TICK_DEDUP = {
+            "COCONUT_COUPON": False,
+            "INVENTORY": False,
+            "SUNDIAL": True,
+        }
+        # SUNDIAL seasonality: sliding DFT over 100 ticks, periods 4 to 50; a cycle only
+        # counts above the strength white noise reaches in 99% of windows (about 0.28)
+        SEASONAL_WINDOW = 100
+        SEASONAL_BINS = range(2, 26)
+        SEASONAL_MIN_STRENGTH = 0.3
+        # INVENTORY ensemble: starting weights per signal column, learning rate, RMS span
+        ENSEMBLE_INITIAL_WEIGHTS = [0.4, 0.4, 0.2]
+        ENSEMBLE_LEARNING_RATE = 0.05
+        ENSEMBLE_SPAN = 100
+        # Portfolio risk parity: lots per tick shared across products, covariance span and shrinkage,
+        # and the solver's step cap and relative tolerance
+        PORTFOLIO_LOTS = 30
+        PORTFOLIO_SPAN = 100
+        PORTFOLIO_SHRINKAGE = 0.2
+        PORTFOLIO_MAX_STEPS = 20
+        PORTFOLIO_TOLERANCE = 1e-3
+        PORTFOLIO_MIN_COUNT = 20
+
+        # Size every product from a shared covariance before running the strategies
+        if hist_data["portfolio"].get("products") != PRODUCTS:
+            hist_data["portfolio"] = new_risk_parity(PRODUCTS, PORTFOLIO_SPAN, PORTFOLIO_SHRINKAGE)
+        portfolio_mids = {}
+        for product in PRODUCTS:
+            depth = state.order_depths.get(product)
+            if depth is not None and depth.buy_orders and depth.sell_orders:
+                portfolio_mids[product] = (max(depth.buy_orders.keys()) + min(depth.sell_orders.keys())) / 2.0
+        update_risk_parity(hist_data["portfolio"], portfolio_mids, PORTFOLIO_MAX_STEPS, PORTFOLIO_TOLERANCE)
+        risk_lots = risk_parity_lots(hist_data["portfolio"], PORTFOLIO_LOTS, POSITION_LIMIT, PORTFOLIO_MIN_COUNT)
 
         for product in PRODUCTS:
             if product not in state.order_depths:
+                # Orders cached before a gap must not be replayed when the product returns
+                hist_data["tick_cache"].pop(product, None)
                 continue
 
             order_depth = state.order_depths[product]
@@ -50,6 +482,26 @@ class Trader:
             mid_price = (best_bid + best_ask) / 2.0 if best_bid and best_ask else None
             spread = best_ask - best_bid if best_bid and best_ask else None
 
+            # Skip recomputation when nothing observable changed since the last tick
+            signature = None
+            if TICK_DEDUP.get(product, False):
+                trades = state.market_trades.get(product, []) + state.own_trades.get(product, [])
+                signature = book_signature(order_depth, trades, current_pos, BOOK_DEPTH)
+                tick_cache = hist_data["tick_cache"].get(product)
+                if tick_cache is not None and tick_cache["signature"] == signature:
+                    # The seasonal window still advances on a repeated tick, by an unchanged mid
+                    time_data = hist_data["time_data"].get(product)
+                    if time_data is not None and "seasonal" in time_data and mid_price is not None:
+                        update_sliding_dft(time_data["seasonal"], mid_price)
+                    if tick_cache["orders"]:
+                        result[product] = [Order(product, price, qty) for price, qty in tick_cache["orders"]]
+                    if self.journal is not None:
+                        self.journal.record(
+                            state.timestamp, product, current_pos, best_bid, best_ask, (),
+                            result.get(product, []), state.own_trades.get(product, [])
+                        )
+                    continue
+
             # Update price history
             if mid_price is not None:
                 if product not in hist_data["prices"]:
@@ -58,6 +510,8 @@ class Trader:
                 hist_data["prices"][product] = hist_data["prices"][product][-100:]
 
             orders = []
+            # Key signal values behind this tick's orders, for the journal
+            journal_signals = ()
 
             # COCONUT_COUPON: Options-Inspired Delta Hedging
             if product == "COCONUT_COUPON":
@@ -86,6 +540,7 @@ class Trader:
                     gamma = new_delta - risk_data["delta"]
                     risk_data["delta"] = new_delta
                     risk_data["gamma"] = gamma
+                    journal_signals = (new_delta, gamma, momentum)
                     
                     # Delta hedging logic
                     target_position = int(risk_data["delta"] * POSITION_LIMIT * 0.5)
@@ -112,8 +567,7 @@ class Trader:
                         hist_data["ensemble_signals"][product] = {
                             "momentum_signal": 0,
                             "mean_reversion_signal": 0,
-                            "volatility_signal": 0,
-                            "ensemble_weight": 0
+                            "volatility_signal": 0
                         }
                     
                     ensemble_data = hist_data["ensemble_signals"][product]
@@ -131,28 +585,34 @@ class Trader:
                     
                     # Strategy 3: Volatility Signal
                     volatility = np.std(prices[-10:])
-                    avg_volatility = np.mean([np.std(prices[i:i+10]) for i in range(len(prices)-20, len(prices)-10)])
+                    avg_volatility = np.mean(window_stds(np.asarray(prices, dtype=np.float64), len(prices) - 20, len(prices) - 10, 10))
                     volatility_signal = (volatility - avg_volatility) / avg_volatility if avg_volatility > 0 else 0
                     ensemble_data["volatility_signal"] = volatility_signal
                     
-                    # Calculate ensemble weight based on signal agreement
+                    # Signal columns for the online learner; any number of features can be added here
                     signals = [momentum_signal, mean_reversion_signal, volatility_signal]
-                    signal_agreement = 1 - np.std(signals)  # Higher agreement = higher weight
-                    ensemble_data["ensemble_weight"] = max(0.1, signal_agreement)
-                    
-                    # Risk parity position sizing
-                    volatility_ratio = volatility / mid_price if mid_price > 0 else 1
-                    risk_adjusted_size = int(10 / (volatility_ratio + 0.1))
-                    
-                    # Combined signal
-                    combined_signal = (
-                        momentum_signal * 0.4 +
-                        mean_reversion_signal * 0.4 +
-                        volatility_signal * 0.2
-                    ) * ensemble_data["ensemble_weight"]
-                    
-                    # Trading logic
-                    threshold = 0.02
+                    if "learner" not in ensemble_data or len(ensemble_data["learner"]["pos"]) != len(signals):
+                        initial_weights = ENSEMBLE_INITIAL_WEIGHTS if len(signals) == len(ENSEMBLE_INITIAL_WEIGHTS) else [1.0 / len(signals)] * len(signals)
+                        ensemble_data["learner"] = new_weight_learner(initial_weights, ENSEMBLE_LEARNING_RATE, ENSEMBLE_SPAN)
+                    
+                    # Learn from the return realised since the last tick, then combine this tick's signals
+                    weighted_signal = update_weight_learner(ensemble_data["learner"], signals, mid_price)
+                    ensemble_data["signal_weights"] = learner_weights(ensemble_data["learner"])
+                    
+                    # Risk parity position sizing, falling back to own volatility while the covariance warms up
+                    if product in risk_lots:
+                        risk_adjusted_size = risk_lots[product]
+                    else:
+                        volatility_ratio = volatility / mid_price if mid_price > 0 else 1
+                        risk_adjusted_size = int(10 / (volatility_ratio + 0.1))
+                    
+                    # Combined signal; the learned weights already say how far to trust each column,
+                    # and any further scaling would have to be scale-free like the prediction itself
+                    combined_signal = weighted_signal
+                    journal_signals = (combined_signal,) + tuple(ensemble_data["signal_weights"][:3])
+                    
+                    # Trading logic; the learner's prediction is in units of signal RMS
+                    threshold = 0.75
                     if abs(combined_signal) > threshold:
                         if combined_signal > 0:  # Buy signal
                             if best_ask and current_pos < POSITION_LIMIT:
@@ -167,24 +627,24 @@ class Trader:
 
             # SUNDIAL: Time-Based Arbitrage with Calendar Effects
             elif product == "SUNDIAL":
-                if len(hist_data["prices"][product]) >= 50:
+                if mid_price is not None and len(hist_data["prices"][product]) >= 50:
                     prices = hist_data["prices"][product]
                     
                     if product not in hist_data["time_data"]:
                         hist_data["time_data"][product] = {
-                            "time_step": 0,
-                            "seasonal_pattern": [],
                             "intraday_volatility": []
                         }
                     
                     time_data = hist_data["time_data"][product]
-                    time_data["time_step"] += 1
                     
-                    # Track seasonal patterns (simplified)
-                    if len(time_data["seasonal_pattern"]) < 100:
-                        time_data["seasonal_pattern"].append(mid_price)
-                    else:
-                        time_data["seasonal_pattern"] = time_data["seasonal_pattern"][1:] + [mid_price]
+                    # Risk parity lot size; pattern 2 trades two thirds of pattern 1
+                    lot_size = risk_lots.get(product, 6)
+                    
+                    # Track seasonal patterns with a sliding DFT
+                    if "seasonal" not in time_data:
+                        time_data["seasonal"] = new_sliding_dft(SEASONAL_WINDOW, SEASONAL_BINS)
+                    seasonal = time_data["seasonal"]
+                    update_sliding_dft(seasonal, mid_price)
                     
                     # Calculate intraday volatility
                     if len(prices) >= 10:
@@ -192,30 +652,29 @@ class Trader:
                         time_data["intraday_volatility"].append(recent_volatility)
                         time_data["intraday_volatility"] = time_data["intraday_volatility"][-20:]
                     
-                    # Time-based trading patterns
-                    time_step = time_data["time_step"]
-                    
                     # Pattern 1: End-of-period mean reversion
-                    if len(time_data["seasonal_pattern"]) >= 20:
-                        seasonal_mean = np.mean(time_data["seasonal_pattern"][-20:])
+                    if seasonal["count"] >= 20:
+                        seasonal_mean = np.mean(prices[-20:])
                         seasonal_deviation = (mid_price - seasonal_mean) / seasonal_mean if seasonal_mean > 0 else 0
                         
-                        # Stronger mean reversion at certain time steps
+                        # Demand a larger deviation near the extremes of a detected cycle,
+                        # where part of the move is explained by seasonality itself
                         time_multiplier = 1.0
-                        if time_step % 10 == 0:  # Every 10th step
-                            time_multiplier = 1.5
-                        elif time_step % 5 == 0:  # Every 5th step
-                            time_multiplier = 1.2
+                        if seasonal["count"] >= SEASONAL_WINDOW:
+                            period, phase, amplitude, strength = dominant_cycle(seasonal)
+                            if period is not None and strength > SEASONAL_MIN_STRENGTH:
+                                time_multiplier = 1.0 + 0.5 * strength * np.cos(phase) ** 2
                         
+                        journal_signals = (seasonal_deviation, time_multiplier)
                         if abs(seasonal_deviation) > 0.015 * time_multiplier:
                             if seasonal_deviation > 0:  # Overvalued
                                 if best_bid and current_pos > -POSITION_LIMIT:
-                                    sell_qty = min(6, POSITION_LIMIT + current_pos)
+                                    sell_qty = min(lot_size, POSITION_LIMIT + current_pos)
                                     if sell_qty > 0:
                                         orders.append(Order(product, best_bid, -sell_qty))
                             else:  # Undervalued
                                 if best_ask and current_pos < POSITION_LIMIT:
-                                    buy_qty = min(6, POSITION_LIMIT - current_pos)
+                                    buy_qty = min(lot_size, POSITION_LIMIT - current_pos)
                                     if buy_qty > 0:
                                         orders.append(Order(product, best_ask, buy_qty))
                     
@@ -230,18 +689,30 @@ class Trader:
                             
                             if short_trend > 0:  # Upward momentum
                                 if best_ask and current_pos < POSITION_LIMIT:
-                                    buy_qty = min(4, POSITION_LIMIT - current_pos)
+                                    buy_qty = min(max(1, lot_size * 2 // 3), POSITION_LIMIT - current_pos)
                                     if buy_qty > 0:
                                         orders.append(Order(product, best_ask, buy_qty))
                             elif short_trend < 0:  # Downward momentum
                                 if best_bid and current_pos > -POSITION_LIMIT:
-                                    sell_qty = min(4, POSITION_LIMIT + current_pos)
+                                    sell_qty = min(max(1, lot_size * 2 // 3), POSITION_LIMIT + current_pos)
                                     if sell_qty > 0:
                                         orders.append(Order(product, best_bid, -sell_qty))
 
+            if self.journal is not None:
+                self.journal.record(
+                    state.timestamp, product, current_pos, best_bid, best_ask, journal_signals,
+                    orders, state.own_trades.get(product, [])
+                )
+
+            if signature is not None:
+                hist_data["tick_cache"][product] = {
+                    "signature": signature,
+                    "orders": [(order.price, order.quantity) for order in orders]
+                }
+
             if len(orders) > 0:
                 result[product] = orders
 
         conversions = 0
-        traderData = jsonpickle.encode(hist_data)
+        traderData = self.save_hist_data(hist_data)
         return result, conversions, traderData 
\ No newline at end of file
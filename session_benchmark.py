@@ -0,0 +1,225 @@
+"""
+Long-session latency and memory benchmark for the round files.
+
+Each round's Trader is replayed over a long synthetic session from
+backtest.synthetic_day, with fills, so positions move as they would live.
+New symbols keep being listed and delisted during the session, since
+strategies that key state on every symbol they have seen grow with them.
+Per round the benchmark records:
+- per-tick `Trader.run` latency percentiles
+- peak traced memory (tracemalloc, measured in a second replay so tracing
+  does not inflate the latencies)
+- traderData size in bytes at each quarter of the session
+
+Results are compared against a JSON baseline recorded with
+`--update-baseline`. Latency percentiles are the median over several timed
+replays, and are compared relative to a fixed calibration workload timed in
+the same process, so a baseline recorded on one machine still applies on
+another; memory and traderData are compared directly.
+test_session_benchmark.py asserts the same checks under pytest, and this
+script exits non-zero when any of them fails.
+
+Needs the competition's datamodel.py importable, like the rounds themselves.
+
+    python session_benchmark.py [--ticks 5000] [--update-baseline] [round1 ...]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import jsonpickle
+import numpy as np
+
+from backtest import ROUND_PRODUCTS, Replay, synthetic_day
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_benchmark_baseline.json")
+
+# A new symbol is listed every LISTING_EVERY ticks and quoted for LISTING_TICKS
+LISTING_EVERY = 500
+LISTING_TICKS = 1000
+
+SESSION_TICKS = 5000
+# Timed replays per round; each latency percentile is the median over them
+LATENCY_REPLAYS = 3
+
+LATENCY_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+# Allowed traderData growth from the second quarter of the session to the last
+GROWTH_LIMIT = 0.1
+
+
+def calibrate(repeats=20, iterations=1000):
+    """
+    Per-iteration time (us) of a fixed workload shaped like a Trader tick:
+    a short price window through NumPy reductions, then a JSON dump and the
+    jsonpickle encode every round ends its tick with. Latencies divided by it
+    compare across machines; the fastest repeat is kept to shed scheduling noise.
+    """
+    prices = np.linspace(100.0, 110.0, 100)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(iterations):
+            state = {"prices": prices[-25:].tolist(), "count": i}
+            window = np.asarray(state["prices"])
+            state["mean"] = float(window.mean())
+            state["std"] = float(window.std())
+            json.dumps(state)
+            jsonpickle.encode(state)
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Baseline results by round, or {} when none has been recorded."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def make_session(module, n_ticks, seed=0):
+    """The round's products quoted throughout, plus a rolling series of short-lived listings."""
+    listed = {}
+    for i, first in enumerate(range(LISTING_EVERY, n_ticks, LISTING_EVERY)):
+        listed[f"LISTING_{i}"] = (first, first + LISTING_TICKS)
+    return synthetic_day(ROUND_PRODUCTS[module] + sorted(listed), n_ticks, seed=seed, listed=listed)
+
+
+def measure(module, n_ticks, seed=0):
+    """
+    Latency percentiles (us, median over LATENCY_REPLAYS replays) with the
+    calibration time (us) measured alongside them, peak traced memory (KB) and
+    traderData bytes per quarter for one round.
+    """
+    session = make_session(module, n_ticks, seed)
+    calibration = calibrate()
+
+    percentiles = []
+    for _ in range(LATENCY_REPLAYS):
+        replay = Replay(module, session)
+        latencies = np.zeros(n_ticks)
+        sizes = np.zeros(n_ticks, dtype=np.int64)
+        for tick in range(n_ticks):
+            replay.step()
+            latencies[tick] = replay.last_run_seconds * 1e6
+            sizes[tick] = len(replay.trader_data)
+        percentiles.append({
+            "p50": np.percentile(latencies, 50),
+            "p90": np.percentile(latencies, 90),
+            "p99": np.percentile(latencies, 99),
+            "max": latencies.max(),
+        })
+        calibration = min(calibration, calibrate())
+
+    replay = Replay(module, session)
+    tracemalloc.start()
+    try:
+        replay.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    quarter = n_ticks // 4
+    early = sizes[quarter:2 * quarter].mean()
+    late = sizes[3 * quarter:].mean()
+    return {
+        "ticks": n_ticks,
+        "latency_us": {key: float(np.median([sample[key] for sample in percentiles])) for key in percentiles[0]},
+        "calibration_us": calibration,
+        "peak_kb": peak / 1024,
+        "trader_data_bytes": [int(sizes[min(q * quarter, n_ticks) - 1]) for q in range(1, 5)],
+        "trader_data_growth": float(late / early - 1) if early > 0 else 0.0,
+    }
+
+
+def growth_regressions(module, result):
+    """Human-readable failures of the traderData growth limit; needs no baseline."""
+    if result["trader_data_growth"] > GROWTH_LIMIT:
+        return [f"{module} traderData grew {result['trader_data_growth']:.0%} over the second half of the session"]
+    return []
+
+
+def memory_regressions(module, result, baseline, memory_tolerance=MEMORY_TOLERANCE):
+    """Human-readable peak memory and final traderData regressions against a baseline entry."""
+    found = []
+    limit = baseline["peak_kb"] * (1 + memory_tolerance)
+    if result["peak_kb"] > limit:
+        found.append(f"{module} peak memory {result['peak_kb']:.0f} KB > {limit:.0f} KB")
+    limit = baseline["trader_data_bytes"][-1] * (1 + memory_tolerance)
+    if result["trader_data_bytes"][-1] > limit:
+        found.append(f"{module} final traderData {result['trader_data_bytes'][-1]} bytes > {limit:.0f} bytes")
+    return found
+
+
+def latency_regressions(module, result, baseline, latency_tolerance=LATENCY_TOLERANCE):
+    """
+    Human-readable p50/p99 latency regressions against a baseline entry, with
+    both sides expressed in calibration units so machine speed cancels out.
+    """
+    found = []
+    for percentile in ("p50", "p99"):
+        relative = result["latency_us"][percentile] / result["calibration_us"]
+        limit = baseline["latency_us"][percentile] / baseline["calibration_us"] * (1 + latency_tolerance)
+        if relative > limit:
+            found.append(f"{module} {percentile} latency {relative:.1f} > {limit:.1f} calibration units")
+    return found
+
+
+def comparable(result, baseline):
+    """Whether a baseline entry was recorded with calibration over a session of the same length."""
+    return baseline is not None and baseline["ticks"] == result["ticks"] and "calibration_us" in baseline
+
+
+def regressions(module, result, baseline, latency_tolerance=LATENCY_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Every human-readable regression of `result`, skipping baseline comparisons that do not apply."""
+    found = growth_regressions(module, result)
+    if comparable(result, baseline):
+        found.extend(memory_regressions(module, result, baseline, memory_tolerance))
+        found.extend(latency_regressions(module, result, baseline, latency_tolerance))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=SESSION_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-tolerance", type=float, default=LATENCY_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("rounds", nargs="*", default=sorted(ROUND_PRODUCTS))
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+
+    found = []
+    print(f"{'round':<8} {'p50 us':>8} {'p90 us':>8} {'p99 us':>8} {'max us':>9} {'calib us':>9} {'peak KB':>9} {'traderData bytes by quarter':>30} {'growth':>7}")
+    for module in args.rounds:
+        result = measure(module, args.ticks, args.seed)
+        latency = result["latency_us"]
+        sizes = "/".join(str(size) for size in result["trader_data_bytes"])
+        print(
+            f"{module:<8} {latency['p50']:>8.0f} {latency['p90']:>8.0f} {latency['p99']:>8.0f} {latency['max']:>9.0f} {result['calibration_us']:>9.1f} "
+            f"{result['peak_kb']:>9.0f} {sizes:>30} {result['trader_data_growth']:>7.1%}"
+        )
+        found.extend(regressions(module, result, baseline.get(module), args.latency_tolerance, args.memory_tolerance))
+        if args.update_baseline:
+            baseline[module] = result
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+
+    for message in found:
+        print(f"regression: {message}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
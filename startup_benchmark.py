@@ -0,0 +1,104 @@
+"""
+Cold-start benchmark for the round files.
+
+Each measurement runs in a fresh interpreter and times three things: importing
+the round module, the first `Trader.run` call on an empty traderData, and a
+second call that carries the first call's traderData. Results are medians over
+several interpreters. The script exits non-zero when a round's import, or its
+cold start (import plus first tick), is over budget.
+
+Needs the competition's datamodel.py importable (next to the round files or on
+PYTHONPATH), like the rounds themselves.
+
+    python startup_benchmark.py [--repeats 5] [--import-budget-ms 50] [--cold-start-budget-ms 250]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from backtest import ROUND_PRODUCTS
+
+
+IMPORT_BUDGET_MS = 50.0
+COLD_START_BUDGET_MS = 250.0
+
+# Runs inside the fresh interpreter; the round is imported before anything else
+_PROBE = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+
+import json
+from datamodel import OrderDepth, TradingState, Observation
+
+def make_state(trader_data, timestamp):
+    order_depths = {{}}
+    for i, product in enumerate({products!r}):
+        depth = OrderDepth()
+        depth.buy_orders = {{100 + 10 * i: 10, 99 + 10 * i: 5}}
+        depth.sell_orders = {{102 + 10 * i: -10, 103 + 10 * i: -5}}
+        order_depths[product] = depth
+    return TradingState(trader_data, timestamp, {{}}, order_depths, {{}}, {{}}, {{}}, Observation({{}}, {{}}))
+
+state = make_state("", 0)
+trader = {module}.Trader()
+first_start = time.perf_counter()
+_, _, trader_data = trader.run(state)
+first_end = time.perf_counter()
+
+state = make_state(trader_data, 100)
+second_start = time.perf_counter()
+trader.run(state)
+second_end = time.perf_counter()
+
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_run_ms": (first_end - first_start) * 1000,
+    "second_run_ms": (second_end - second_start) * 1000
+}}))
+"""
+
+
+def measure(module, repeats):
+    """Median import, first-run and second-run milliseconds for one round over fresh interpreters."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = _PROBE.format(module=module, products=ROUND_PRODUCTS[module])
+    samples = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--cold-start-budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("rounds", nargs="*", default=sorted(ROUND_PRODUCTS))
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'round':<8} {'import ms':>10} {'first run ms':>13} {'cold start ms':>14} {'second run ms':>14}")
+    for module in args.rounds:
+        result = measure(module, args.repeats)
+        cold_start = result["import_ms"] + result["first_run_ms"]
+        print(f"{module:<8} {result['import_ms']:>10.2f} {result['first_run_ms']:>13.2f} {cold_start:>14.2f} {result['second_run_ms']:>14.2f}")
+        if result["import_ms"] > args.import_budget_ms:
+            over_budget.append(f"{module} import {result['import_ms']:.1f} ms > {args.import_budget_ms} ms")
+        if cold_start > args.cold_start_budget_ms:
+            over_budget.append(f"{module} cold start {cold_start:.1f} ms > {args.cold_start_budget_ms} ms")
+
+    for message in over_budget:
+        print(f"over budget: {message}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
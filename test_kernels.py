@@ -0,0 +1,10 @@
+import pytest
+
+pytest.importorskip("numba")
+pytest.importorskip("datamodel")
+
+import kernels
+
+
+def test_compiled_kernels_match_python():
+    assert kernels.check_backends(trials=50) == []
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("datamodel")
+
+import session_benchmark
+from backtest import ROUND_PRODUCTS
+
+# pytest keeps every warning it captures, and those records would count as traced memory
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+
+@pytest.fixture(scope="module", params=sorted(ROUND_PRODUCTS))
+def session(request):
+    """(round, result of one long session, its baseline entry or None)."""
+    module = request.param
+    result = session_benchmark.measure(module, session_benchmark.SESSION_TICKS)
+    return module, result, session_benchmark.load_baseline().get(module)
+
+
+def comparable_baseline(result, baseline):
+    if not session_benchmark.comparable(result, baseline):
+        pytest.skip("no baseline for this session length; record one with session_benchmark.py --update-baseline")
+    return baseline
+
+
+def test_trader_data_stops_growing(session):
+    module, result, _ = session
+    assert session_benchmark.growth_regressions(module, result) == []
+
+
+def test_memory_within_baseline(session):
+    module, result, baseline = session
+    baseline = comparable_baseline(result, baseline)
+    assert session_benchmark.memory_regressions(module, result, baseline) == []
+
+
+def test_relative_latency_within_baseline(session):
+    module, result, baseline = session
+    baseline = comparable_baseline(result, baseline)
+    assert session_benchmark.latency_regressions(module, result, baseline) == []
@@ -0,0 +1,387 @@
+"""
+Walk-forward evaluation of threshold parameters over multi-day price files.
+
+Sweeping a threshold (BAGUETTE's regime confidence and deviation cutoffs in
+round 3, PICNIC_BASKET's z-score bands in round 4) does not change any of
+the moving averages, regime statistics or factor-model residuals the
+strategy computes. Those are computed once per day, with the round's own
+helper functions, and cached as memory-mapped .npy files that later runs
+and parallel processes share. Every combination in the parameter grid is
+then simulated at once, with NumPy operations along the parameter axis,
+instead of replaying `Trader.run` once per combination.
+
+Days are independent sessions that start flat. Each fold picks the
+combination with the best PnL over `--train-days` days and reports its PnL
+over the following `--test-days` days.
+
+    python walk_forward.py baguette data/prices_round_3_day_*.csv --train-days 2
+    python walk_forward.py picnic_basket data/prices_round_4_day_*.csv --grid upper=1,1.5,2 --check
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from backtest import POSITION_LIMITS, Replay, load_day, sort_day_files
+
+
+# Bump when a feature function changes, so cached features are recomputed
+FEATURE_VERSION = 2
+
+
+def book_features(ticks, product):
+    """Top of book and mid for one product: what the simulated orders trade against."""
+    p = ticks.products.index(product)
+    return {
+        "bid": ticks.bid_prices[:, p, 0].copy(),
+        "ask": ticks.ask_prices[:, p, 0].copy(),
+        "bid_volume": ticks.bid_volumes[:, p, 0].copy(),
+        "ask_volume": ticks.ask_volumes[:, p, 0].copy(),
+        "mid": ticks.mid[:, p].copy(),
+    }
+
+
+def round_constants(strategy):
+    """The round module's own constants a strategy's features and sides are built from."""
+    config = STRATEGIES[strategy]
+    module = importlib.import_module(config["round"])
+    return {name: getattr(module, name) for name in config["constants"]}
+
+
+def default_params(strategy):
+    """The round's own thresholds for a strategy's grid parameters, one combination."""
+    config = STRATEGIES[strategy]
+    module = importlib.import_module(config["round"])
+    return {name: np.array([getattr(module, constant)], dtype=np.float64) for name, constant in config["defaults"].items()}
+
+
+def baguette_features(ticks):
+    """
+    Per-tick BAGUETTE inputs from round 3, replayed with its helpers and
+    module constants: the raw regime call (+1 trending, -1 mean reverting,
+    0 otherwise) with its confidence, the deviation from the SMA and the
+    fast/slow MA cross.
+    """
+    round3 = importlib.import_module("round3")
+    features = book_features(ticks, "BAGUETTE")
+    n = len(ticks)
+    ready = np.zeros(n, dtype=np.int8)
+    regime = np.zeros(n, dtype=np.int8)
+    confidence = np.zeros(n)
+    deviation = np.zeros(n)
+    cross = np.zeros(n, dtype=np.int8)
+
+    stats = round3.new_regime_stats(round3.REGIME_LAGS, round3.REGIME_BLOCKS, round3.REGIME_SPAN)
+    prices = []
+    for t, mid_price in enumerate(features["mid"].tolist()):
+        if mid_price != mid_price:
+            continue
+        prices.append(mid_price)
+        prices = prices[-round3.PRICE_WINDOW:]
+        round3.update_regime_stats(stats, mid_price)
+        if len(prices) < round3.BAGUETTE_SMA:
+            continue
+
+        label, confidence[t] = round3.classify_regime(stats)
+        regime[t] = {"trending": 1, "mean_reverting": -1}.get(label, 0)
+        sma = np.mean(prices[-round3.BAGUETTE_SMA:])
+        deviation[t] = (mid_price - sma) / sma
+        cross[t] = 1 if np.mean(prices[-round3.BAGUETTE_FAST_MA:]) > np.mean(prices[-round3.BAGUETTE_SLOW_MA:]) else -1
+        ready[t] = 1
+
+    features.update(ready=ready, regime=regime, confidence=confidence, deviation=deviation, cross=cross)
+    return features
+
+
+def baguette_sides(features, params):
+    """
+    (ticks, combinations) order sides and sizes for BAGUETTE. The active
+    regime only switches on a call at or above `regime_confidence`, so it is
+    the last such call carried forward.
+    """
+    round3 = importlib.import_module("round3")
+    ready = np.asarray(features["ready"], dtype=bool)[:, None]
+    regime = np.asarray(features["regime"])
+    confidence = np.asarray(features["confidence"])[:, None]
+    deviation = np.asarray(features["deviation"])[:, None]
+    cross = np.asarray(features["cross"])[:, None]
+
+    eligible = ready & (regime[:, None] != 0) & (confidence >= params["regime_confidence"][None, :])
+    last_call = np.where(eligible, np.arange(len(regime))[:, None], -1)
+    np.maximum.accumulate(last_call, axis=0, out=last_call)
+    active = np.where(last_call >= 0, regime[np.maximum(last_call, 0)], 0)
+
+    cutoff = params["deviation"][None, :]
+    reversion = np.where(deviation > cutoff, -1, np.where(deviation < -cutoff, 1, 0))
+    side = np.where(active == -1, reversion, np.where(active == 1, cross, 0)) * ready
+    size = np.where(active == -1, round3.BAGUETTE_REVERSION_LOTS, round3.BAGUETTE_TREND_LOTS)
+    return side.astype(np.int8), size.astype(np.int8)
+
+
+def picnic_basket_features(ticks):
+    """
+    Per-tick PICNIC_BASKET factor-model residual z-score from round 4, NaN
+    while the model warms up. The model sees every product quoted that tick.
+    """
+    round4 = importlib.import_module("round4")
+    features = book_features(ticks, "PICNIC_BASKET")
+    z_score = np.full(len(ticks), np.nan)
+
+    model = round4.new_factor_model(round4.PCA_COMPONENTS, round4.PCA_SPAN, round4.PCA_RESIDUAL_DECAY, round4.PCA_MAX_IDLE)
+    mids = ticks.mid.tolist()
+    for t in range(len(ticks)):
+        universe_mids = {product: mid for product, mid in zip(ticks.products, mids[t]) if mid == mid}
+        if universe_mids:
+            round4.update_factor_model(model, universe_mids)
+        z = round4.factor_residual_zscore(model, "PICNIC_BASKET", round4.PCA_MIN_COUNT)
+        if z is not None:
+            z_score[t] = z
+
+    features["z_score"] = z_score
+    return features
+
+
+def picnic_basket_sides(features, params):
+    """(ticks, combinations) order sides and sizes for PICNIC_BASKET's z-score bands."""
+    round4 = importlib.import_module("round4")
+    z_score = np.asarray(features["z_score"])[:, None]
+    side = np.where(z_score > params["upper"][None, :], -1, np.where(z_score < -params["lower"][None, :], 1, 0))
+    return side.astype(np.int8), np.full(side.shape, round4.PICNIC_LOTS, dtype=np.int8)
+
+
+STRATEGIES = {
+    "baguette": {
+        "round": "round3",
+        "product": "BAGUETTE",
+        "features": baguette_features,
+        "sides": baguette_sides,
+        # Module constants of the round that feed the features and sides, part of the cache key
+        "constants": [
+            "PRICE_WINDOW", "REGIME_LAGS", "REGIME_BLOCKS", "REGIME_SPAN", "BAGUETTE_SMA",
+            "BAGUETTE_FAST_MA", "BAGUETTE_SLOW_MA", "BAGUETTE_REVERSION_LOTS", "BAGUETTE_TREND_LOTS",
+        ],
+        # Grid parameter -> the round's own constant for it
+        "defaults": {"regime_confidence": "REGIME_CONFIDENCE", "deviation": "BAGUETTE_DEVIATION"},
+        "grid": {
+            "regime_confidence": [0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95],
+            "deviation": [0.001, 0.0025, 0.005, 0.0075, 0.01, 0.0125, 0.015, 0.02, 0.025, 0.03],
+        },
+    },
+    "picnic_basket": {
+        "round": "round4",
+        "product": "PICNIC_BASKET",
+        "features": picnic_basket_features,
+        "sides": picnic_basket_sides,
+        "constants": ["PCA_COMPONENTS", "PCA_SPAN", "PCA_RESIDUAL_DECAY", "PCA_MIN_COUNT", "PCA_MAX_IDLE", "PICNIC_LOTS"],
+        "defaults": {"upper": "PICNIC_Z_BAND", "lower": "PICNIC_Z_BAND"},
+        "grid": {
+            "upper": [0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 3.5],
+            "lower": [0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 3.5],
+        },
+    },
+}
+
+
+class FeatureCache:
+    """
+    Parameter-independent features stored as .npy files under `directory`
+    and opened memory-mapped. A strategy's features for one price file are
+    computed on first use and reused until the file, FEATURE_VERSION or one
+    of the round constants they depend on changes; the OS page cache shares
+    them between concurrent sweeps.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as manifest_file:
+                self.manifest = json.load(manifest_file)
+
+    def _source(self, strategy, path):
+        info = os.stat(path)
+        # Round-tripped through JSON so it compares equal to the manifest's copy
+        constants = json.loads(json.dumps(round_constants(strategy)))
+        return [os.path.abspath(path), info.st_size, info.st_mtime_ns, FEATURE_VERSION, constants]
+
+    def _file(self, key, name):
+        return os.path.join(self.directory, f"{key}.{name}.npy")
+
+    def load(self, strategy, path):
+        """Features of `strategy` for one price file as read-only memory-mapped arrays."""
+        key = f"{strategy}.{os.path.splitext(os.path.basename(path))[0]}"
+        entry = self.manifest.get(key)
+        if entry is None or entry["source"] != self._source(strategy, path) or not all(
+            os.path.exists(self._file(key, name)) for name in entry["names"]
+        ):
+            self._build(strategy, path, key)
+            entry = self.manifest[key]
+        return {name: np.load(self._file(key, name), mmap_mode="r") for name in entry["names"]}
+
+    def _build(self, strategy, path, key):
+        features = STRATEGIES[strategy]["features"](load_day(path))
+        for name, values in features.items():
+            stored = np.lib.format.open_memmap(self._file(key, name), mode="w+", dtype=values.dtype, shape=values.shape)
+            stored[:] = values
+            stored.flush()
+            del stored
+
+        self.manifest[key] = {"source": self._source(strategy, path), "names": sorted(features)}
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=1)
+        os.replace(temporary, self.manifest_path)
+
+
+def grid_combinations(grid):
+    """Cartesian product of a {name: values} grid as {name: array over combinations}."""
+    names = sorted(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    return {name: np.array([combination[i] for combination in combinations], dtype=np.float64) for i, name in enumerate(names)}
+
+
+def simulate(features, side, size, limit):
+    """
+    Day PnL of every combination at once. A +1 side buys `size` at the best
+    ask and -1 sells at the best bid, capped by the position limit and by
+    the top level's volume, exactly as backtest.fill_orders fills the
+    Trader's own orders. Open positions are marked to the day's last mid.
+    """
+    bid = np.asarray(features["bid"])
+    ask = np.asarray(features["ask"])
+    bid_volume = np.asarray(features["bid_volume"])
+    ask_volume = np.asarray(features["ask_volume"])
+    mid = np.asarray(features["mid"])
+
+    position = np.zeros(side.shape[1], dtype=np.int64)
+    cash = np.zeros(side.shape[1])
+    # Only ticks where some combination wants to trade can move a position
+    for t in np.flatnonzero((side != 0).any(axis=1)):
+        want = size[t].astype(np.int64)
+        buy = np.where((side[t] > 0) & (ask_volume[t] > 0), np.minimum(np.minimum(want, limit - position), ask_volume[t]), 0)
+        sell = np.where((side[t] < 0) & (bid_volume[t] > 0), np.minimum(np.minimum(want, limit + position), bid_volume[t]), 0)
+        buy = np.maximum(buy, 0)
+        sell = np.maximum(sell, 0)
+        position += buy - sell
+        cash += sell * bid[t] - buy * ask[t]
+
+    seen = mid[~np.isnan(mid)]
+    mark = seen[-1] if len(seen) else 0.0
+    return cash + position * mark
+
+
+def sweep(strategy, features, params):
+    """PnL of every parameter combination in `params` on one day of features."""
+    config = STRATEGIES[strategy]
+    side, size = config["sides"](features, params)
+    return simulate(features, side, size, POSITION_LIMITS[config["round"]])
+
+
+def walk_forward(strategy, paths, cache, grid, train_days, test_days):
+    """
+    Rolling folds of `train_days` then `test_days` consecutive days. Returns
+    the per-day PnL matrix (days, combinations), the combinations and, per
+    fold, the best training combination with its train and test PnL.
+    """
+    params = grid_combinations(grid)
+    day_pnl = np.array([sweep(strategy, cache.load(strategy, path), params) for path in paths])
+
+    folds = []
+    for start in range(0, len(paths) - train_days - test_days + 1, test_days):
+        train = slice(start, start + train_days)
+        test = slice(start + train_days, start + train_days + test_days)
+        train_pnl = day_pnl[train].sum(axis=0)
+        best = int(np.argmax(train_pnl))
+        folds.append({
+            "train": paths[train],
+            "test": paths[test],
+            "params": {name: float(values[best]) for name, values in params.items()},
+            "train_pnl": float(train_pnl[best]),
+            "test_pnl": float(day_pnl[test, best].sum()),
+        })
+    return day_pnl, params, folds
+
+
+def check(strategy, path, cache):
+    """
+    Replay the round's Trader over one day and compare its PnL on the
+    strategy's product with the vectorized simulation at the round's own
+    defaults. Returns (replay pnl, simulated pnl, replay seconds).
+    """
+    config = STRATEGIES[strategy]
+    start = time.perf_counter()
+    replay_pnl = Replay(config["round"], load_day(path)).run()[config["product"]]
+    replay_seconds = time.perf_counter() - start
+
+    simulated_pnl = float(sweep(strategy, cache.load(strategy, path), default_params(strategy))[0])
+    return replay_pnl, simulated_pnl, replay_seconds
+
+
+def parse_grid(strategy, overrides):
+    grid = dict(STRATEGIES[strategy]["grid"])
+    for override in overrides:
+        name, _, values = override.partition("=")
+        if name not in grid:
+            raise SystemExit(f"unknown parameter {name!r} for {strategy}; expected one of {sorted(grid)}")
+        grid[name] = [float(value) for value in values.split(",")]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("price_files", nargs="+")
+    parser.add_argument("--train-days", type=int, default=2)
+    parser.add_argument("--test-days", type=int, default=1)
+    parser.add_argument("--cache", default=".feature_cache")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--check", action="store_true", help="replay the Trader on the first day at the default parameters")
+    args = parser.parse_args()
+
+    paths = sort_day_files(args.price_files)
+    if len(paths) < args.train_days + args.test_days:
+        raise SystemExit(f"need at least {args.train_days + args.test_days} days, got {len(paths)}")
+    grid = parse_grid(args.strategy, args.grid)
+    cache = FeatureCache(args.cache)
+
+    start = time.perf_counter()
+    for path in paths:
+        cache.load(args.strategy, path)
+    features_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    day_pnl, params, folds = walk_forward(args.strategy, paths, cache, grid, args.train_days, args.test_days)
+    sweep_seconds = time.perf_counter() - start
+
+    n_combinations = day_pnl.shape[1]
+    print(f"{args.strategy}: {len(paths)} days x {n_combinations} combinations")
+    print(f"features {features_seconds:.2f} s, sweep {sweep_seconds:.3f} s ({sweep_seconds / day_pnl.size * 1e3:.3f} ms per day-combination)")
+    for fold in folds:
+        chosen = ", ".join(f"{name}={value:g}" for name, value in fold["params"].items())
+        train = ",".join(os.path.basename(path) for path in fold["train"])
+        test = ",".join(os.path.basename(path) for path in fold["test"])
+        print(f"train {train} -> test {test}: {chosen}  train pnl {fold['train_pnl']:.1f}  test pnl {fold['test_pnl']:.1f}")
+    print(f"out-of-sample pnl {sum(fold['test_pnl'] for fold in folds):.1f}")
+
+    if args.check:
+        replay_pnl, simulated_pnl, replay_seconds = check(args.strategy, paths[0], cache)
+        per_day_sweep = sweep_seconds / len(paths)
+        print(f"check {os.path.basename(paths[0])}: Trader replay pnl {replay_pnl:.1f}, vectorized pnl {simulated_pnl:.1f}")
+        print(
+            f"replaying {n_combinations} combinations would take ~{replay_seconds * n_combinations:.1f} s per day "
+            f"vs {per_day_sweep:.3f} s vectorized ({replay_seconds * n_combinations / per_day_sweep:.0f}x)"
+        )
+        if abs(replay_pnl - simulated_pnl) > 1e-6:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())